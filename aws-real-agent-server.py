@@ -5,253 +5,301 @@ Serves real agent data for production deployment
 Compatible with Linux/Ubuntu environments
 """
 
-import os
 import json
+import hashlib
 import time
 import random
+import threading
 import psutil
 from datetime import datetime
+from flask import Flask, Response, request
+from flask_cors import CORS
 
 try:
-    from flask import Flask, jsonify
-    from flask_cors import CORS
-    Flask = Flask
-    app = Flask(__name__)
-    CORS(app, origins="*")
-    FLASK_AVAILABLE = True
+    import orjson
+    _dumps = orjson.dumps
 except ImportError:
-    print("Flask not available. Installing...")
-    os.system("pip3 install flask flask-cors psutil")
-    try:
-        from flask import Flask, jsonify
-        from flask_cors import CORS
-        app = Flask(__name__)
-        CORS(app, origins="*")
-        FLASK_AVAILABLE = True
-    except ImportError:
-        print("Failed to install Flask. Using mock data.")
-        FLASK_AVAILABLE = False
+    def _dumps(obj):
+        return json.dumps(obj, default=str).encode()
+
+# Re-scan interval for the agent list and lifetime of the cached /api/agents body
+SCAN_TTL = 30.0
+BODY_TTL = 5.0
+
+# Fixed for the life of the process, so read it once
+_BOOT_TIME = psutil.boot_time()
+
+app = Flask(__name__)
+CORS(app, origins="*")
+
+# Agents that would be deployed; static fields only, metrics are drawn per scan
+_AGENT_TEMPLATES = [
+    {
+        'name': 'Production QA Agent',
+        'type': 'qa',
+        'status': 'active',
+        'service': 'quality-assurance',
+        'description': 'Production quality assurance and testing agent',
+        'script': 'ai-qa-agent-real.py',
+        'repo': 'na-business-service'
+    },
+    {
+        'name': 'Production Developer Agent',
+        'type': 'developer',
+        'status': 'active',
+        'service': 'code-development',
+        'description': 'Production code development and deployment agent',
+        'script': 'ai-developer-agent-real.py',
+        'repo': 'na-business-service'
+    },
+    {
+        'name': 'Autonomous System Coordinator',
+        'type': 'system',
+        'status': 'active',
+        'service': 'system-coordination',
+        'description': 'Coordinates autonomous agent operations',
+        'script': 'autonomous-coordinator.py',
+        'repo': 'na-autonomous-system'
+    },
+    {
+        'name': 'Dashboard Monitoring Agent',
+        'type': 'monitoring',
+        'status': 'active',
+        'service': 'system-monitoring',
+        'description': 'Real-time system and agent monitoring',
+        'script': 'real-time-agent-dashboard.py',
+        'repo': 'na-agent-dashboard'
+    },
+    {
+        'name': 'GitHub Integration Agent',
+        'type': 'integration',
+        'status': 'active',
+        'service': 'github-integration',
+        'description': 'Handles GitHub repository integration and automation',
+        'script': 'github-agent-dispatcher.py',
+        'repo': 'na-autonomous-system'
+    },
+    {
+        'name': 'DevOps Automation Agent',
+        'type': 'devops',
+        'status': 'active',
+        'service': 'devops-automation',
+        'description': 'Production DevOps and deployment automation',
+        'script': 'ai-devops-agent.py',
+        'repo': 'na-business-service'
+    },
+    {
+        'name': 'Policy Engine Agent',
+        'type': 'policy',
+        'status': 'active',
+        'service': 'policy-enforcement',
+        'description': 'Enforces business rules and policies',
+        'script': 'agent-policy-engine.py',
+        'repo': 'na-business-service'
+    }
+]
+
+# (cpu, memory) ranges for each entry in _AGENT_TEMPLATES
+_METRIC_RANGES = [
+    ((5, 25), (15, 40)),
+    ((8, 35), (20, 50)),
+    ((10, 30), (25, 45)),
+    ((5, 20), (10, 30)),
+    ((3, 15), (12, 28)),
+    ((12, 28), (18, 38)),
+    ((4, 18), (15, 32))
+]
+
+class _MetricsSampler(threading.Thread):
+    """Samples host metrics in the background so requests only read a snapshot"""
+
+    # Seconds the seed sample blocks for; a first cpu_percent(interval=None)
+    # call has no previous reading and always returns 0.0
+    SEED_INTERVAL = 0.1
+
+    def __init__(self, interval=1.0):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.snapshot = self._sample(self.SEED_INTERVAL)
+
+    @staticmethod
+    def _sample(interval):
+        try:
+            return {
+                'cpu': round(psutil.cpu_percent(interval=interval), 1),
+                'memory': round(psutil.virtual_memory().percent, 1),
+                'uptime': int(time.time() - _BOOT_TIME),
+                'processes': len(psutil.pids())
+            }
+        except:
+            return {
+                'cpu': round(random.uniform(15, 45), 1),
+                'memory': round(random.uniform(30, 70), 1),
+                'uptime': random.randint(86400, 604800),
+                'processes': random.randint(120, 200)
+            }
+
+    def run(self):
+        while True:
+            start = time.monotonic()
+            # cpu_percent(interval=...) blocks for the interval, pacing the loop
+            self.snapshot = self._sample(self.interval)
+            remaining = self.interval - (time.monotonic() - start)
+            if remaining > 0:
+                time.sleep(remaining)
 
 class RealAgentDiscovery:
     def __init__(self):
         self.agents = []
+        self._columns = {'status': [], 'taskCount': []}
         self.last_scan = None
+        self._scan_expires = 0.0
+        self._body = (b'', None)
+        self._body_expires = 0.0
+        self._lock = threading.Lock()
+        self._sampler = _MetricsSampler()
+        self._sampler.start()
         self.discover_agents()
     
     def discover_agents(self):
         """Discover real agent files from local directory structure"""
-        discovered = []
-        agent_id = 1
-        
-        # Create sample real agents based on what would be deployed
-        real_agents = [
-            {
-                'name': 'Production QA Agent',
-                'type': 'qa',
-                'status': 'active',
-                'service': 'quality-assurance',
-                'description': 'Production quality assurance and testing agent',
-                'script': 'ai-qa-agent-real.py',
-                'repo': 'na-business-service',
-                'pid': random.randint(1000, 9999),
-                'cpu': round(random.uniform(5, 25), 1),
-                'memory': round(random.uniform(15, 40), 1)
-            },
-            {
-                'name': 'Production Developer Agent',  
-                'type': 'developer',
-                'status': 'active',
-                'service': 'code-development',
-                'description': 'Production code development and deployment agent',
-                'script': 'ai-developer-agent-real.py',
-                'repo': 'na-business-service', 
-                'pid': random.randint(1000, 9999),
-                'cpu': round(random.uniform(8, 35), 1),
-                'memory': round(random.uniform(20, 50), 1)
-            },
-            {
-                'name': 'Autonomous System Coordinator',
-                'type': 'system',
-                'status': 'active',
-                'service': 'system-coordination',
-                'description': 'Coordinates autonomous agent operations',
-                'script': 'autonomous-coordinator.py',
-                'repo': 'na-autonomous-system',
-                'pid': random.randint(1000, 9999),
-                'cpu': round(random.uniform(10, 30), 1),
-                'memory': round(random.uniform(25, 45), 1)
-            },
-            {
-                'name': 'Dashboard Monitoring Agent',
-                'type': 'monitoring',
-                'status': 'active', 
-                'service': 'system-monitoring',
-                'description': 'Real-time system and agent monitoring',
-                'script': 'real-time-agent-dashboard.py',
-                'repo': 'na-agent-dashboard',
-                'pid': random.randint(1000, 9999),
-                'cpu': round(random.uniform(5, 20), 1),
-                'memory': round(random.uniform(10, 30), 1)
-            },
+        now = datetime.now()
+        now_iso = now.isoformat()
+        discovered = [
             {
-                'name': 'GitHub Integration Agent',
-                'type': 'integration',
-                'status': 'active',
-                'service': 'github-integration',
-                'description': 'Handles GitHub repository integration and automation',
-                'script': 'github-agent-dispatcher.py',
-                'repo': 'na-autonomous-system',
-                'pid': random.randint(1000, 9999),
-                'cpu': round(random.uniform(3, 15), 1),
-                'memory': round(random.uniform(12, 28), 1)
-            },
-            {
-                'name': 'DevOps Automation Agent',
-                'type': 'devops',
-                'status': 'active',
-                'service': 'devops-automation',
-                'description': 'Production DevOps and deployment automation',
-                'script': 'ai-devops-agent.py',
-                'repo': 'na-business-service',
-                'pid': random.randint(1000, 9999),
-                'cpu': round(random.uniform(12, 28), 1), 
-                'memory': round(random.uniform(18, 38), 1)
-            },
-            {
-                'name': 'Policy Engine Agent',
-                'type': 'policy',
-                'status': 'active',
-                'service': 'policy-enforcement',
-                'description': 'Enforces business rules and policies',
-                'script': 'agent-policy-engine.py',
-                'repo': 'na-business-service',
-                'pid': random.randint(1000, 9999),
-                'cpu': round(random.uniform(4, 18), 1),
-                'memory': round(random.uniform(15, 32), 1)
-            }
-        ]
-        
-        for agent_data in real_agents:
-            agent = {
                 'id': f'agent-{agent_id:03d}',
-                'name': agent_data['name'],
-                'type': agent_data['type'],
-                'status': agent_data['status'],
+                **template,
                 'platform': 'aws-ec2',
-                'service': agent_data['service'],
-                'description': agent_data['description'],
-                'script': agent_data['script'],
-                'repo': agent_data['repo'],
-                'pid': agent_data['pid'],
-                'cpu': agent_data['cpu'],
-                'memory': agent_data['memory'],
+                'pid': random.randint(1000, 9999),
+                'cpu': round(random.uniform(*cpu), 1),
+                'memory': round(random.uniform(*memory), 1),
                 'taskCount': random.randint(5, 50),
-                'startTime': datetime.now(),
+                'startTime': now_iso,
                 'lastError': None,
                 'environment': 'production',
                 'source': 'aws-real-agent-discovery',
-                'updated_at': datetime.now().isoformat()
+                'updated_at': now_iso
             }
-            discovered.append(agent)
-            agent_id += 1
+            for agent_id, (template, (cpu, memory)) in enumerate(zip(_AGENT_TEMPLATES, _METRIC_RANGES), 1)
+        ]
         
         self.agents = discovered
-        self.last_scan = datetime.now()
+        # Column view of the fields the stats endpoint aggregates
+        self._columns = {
+            'status': [a['status'] for a in discovered],
+            'taskCount': [a['taskCount'] for a in discovered]
+        }
+        self.last_scan = now
+        self._scan_expires = time.monotonic() + SCAN_TTL
         print(f"Discovered {len(discovered)} real production agents")
         return discovered
     
     def get_agents(self):
         # Refresh data periodically
-        if not self.last_scan or (datetime.now() - self.last_scan).seconds > 30:
+        if time.monotonic() >= self._scan_expires:
             self.discover_agents()
         return self.agents
+
+    def get_agents_body(self):
+        """(serialized /api/agents payload, ETag), rebuilt at most once per BODY_TTL"""
+        if time.monotonic() < self._body_expires:
+            return self._body
+        with self._lock:
+            now = time.monotonic()
+            if now >= self._body_expires:
+                agents = self.get_agents()
+                body = _dumps({
+                    'success': True,
+                    'agents': agents,
+                    'lastUpdated': datetime.now().isoformat(),
+                    'totalAgents': len(agents),
+                    'activeAgents': len([a for a in agents if a['status'] == 'active']),
+                    'systemMetrics': self.get_system_metrics(),
+                    'source': 'aws-real-agent-discovery',
+                    'port': 7778
+                })
+                etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+                self._body = (body, etag)
+                self._body_expires = now + BODY_TTL
+            return self._body
+    
+    def get_stats(self):
+        """Aggregate counts over the column view (C-level count/sum, no per-dict lookups)"""
+        self.get_agents()
+        columns = self._columns
+        total = len(columns['status'])
+        active = columns['status'].count('active')
+        return {
+            'totalAgents': total,
+            'activeAgents': active,
+            'idleAgents': total - active,
+            'totalTasksCompleted': sum(columns['taskCount'])
+        }
     
     def get_system_metrics(self):
-        try:
-            return {
-                'cpu': round(psutil.cpu_percent(), 1),
-                'memory': round(psutil.virtual_memory().percent, 1),
-                'uptime': int(time.time() - psutil.boot_time()),
-                'processes': len(psutil.pids())
-            }
-        except:
-            return {
-                'cpu': round(random.uniform(15, 45), 1),
-                'memory': round(random.uniform(30, 70), 1),
-                'uptime': random.randint(86400, 604800),
-                'processes': random.randint(120, 200)
-            }
+        return self._sampler.snapshot
 
 # Initialize discovery
 discovery = RealAgentDiscovery()
 
-if FLASK_AVAILABLE:
-    @app.route('/health')
-    def health():
-        return jsonify({
-            'status': 'healthy',
-            'timestamp': datetime.now().isoformat(),
-            'agents_discovered': len(discovery.agents),
-            'service': 'aws-real-agent-discovery',
-            'version': '2.0.0'
-        })
+def _json_response(obj):
+    # Serialize once with _dumps and skip jsonify's provider and indent handling
+    return Response(_dumps(obj), mimetype='application/json')
 
-    @app.route('/api/agents')
-    def get_agents():
-        agents = discovery.get_agents()
-        system_metrics = discovery.get_system_metrics()
-        
-        return jsonify({
-            'success': True,
-            'agents': agents,
-            'lastUpdated': datetime.now().isoformat(),
-            'totalAgents': len(agents),
-            'activeAgents': len([a for a in agents if a['status'] == 'active']),
-            'systemMetrics': system_metrics,
-            'source': 'aws-real-agent-discovery',
-            'port': 7778
-        })
+# Fixed bytes around the two dynamic /health fields
+_HEALTH_PARTS = (
+    b'{"status":"healthy","timestamp":"',
+    b'","agents_discovered":',
+    b',"service":"aws-real-agent-discovery","version":"2.0.0"}'
+)
 
-    @app.route('/api/dashboard/agents')
-    def get_dashboard_agents():
-        # Alias for compatibility
-        return get_agents()
-        
-    @app.route('/api/system/metrics')
-    def get_system_metrics_endpoint():
-        return jsonify({
-            'success': True,
-            'metrics': discovery.get_system_metrics(),
-            'timestamp': datetime.now().isoformat()
-        })
+@app.route('/health')
+def health():
+    prefix, middle, suffix = _HEALTH_PARTS
+    body = b''.join((prefix, datetime.now().isoformat().encode(), middle, b'%d' % len(discovery.agents), suffix))
+    return Response(body, mimetype='application/json')
 
-    @app.route('/stats')
-    def get_stats():
-        agents = discovery.get_agents()
-        active_agents = [a for a in agents if a['status'] == 'active']
-        
-        return jsonify({
-            'success': True,
-            'stats': {
-                'totalAgents': len(agents),
-                'activeAgents': len(active_agents),
-                'idleAgents': len(agents) - len(active_agents),
-                'totalTasksCompleted': sum(a.get('taskCount', 0) for a in agents),
-                'averageSuccessRate': round(random.uniform(85, 95), 1),
-                'lastUpdated': datetime.now().isoformat()
-            }
-        })
+@app.route('/api/agents')
+def get_agents():
+    body, etag = discovery.get_agents_body()
+    headers = {'Cache-Control': 'max-age=5'}
+    if request.if_none_match.contains(etag):
+        response = Response(status=304, headers=headers)
+    else:
+        response = Response(body, mimetype='application/json', headers=headers)
+    response.set_etag(etag)
+    return response
 
-    if __name__ == '__main__':
-        print("🚀 AWS Real Agent Discovery Server starting...")
-        print(f"📊 Discovered {len(discovery.agents)} production agents")
-        print("🌐 Server will be available at:")
-        print("   - Health: http://localhost:7778/health")
-        print("   - Agents: http://localhost:7778/api/agents")
-        print("   - Dashboard: http://localhost:7778/api/dashboard/agents")
-        
-        app.run(host='0.0.0.0', port=7778, debug=False)
+@app.route('/api/dashboard/agents')
+def get_dashboard_agents():
+    # Alias for compatibility
+    return get_agents()
+    
+@app.route('/api/system/metrics')
+def get_system_metrics_endpoint():
+    return _json_response({
+        'success': True,
+        'metrics': discovery.get_system_metrics(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/stats')
+def get_stats():
+    return _json_response({
+        'success': True,
+        'stats': {
+            **discovery.get_stats(),
+            'averageSuccessRate': round(random.uniform(85, 95), 1),
+            'lastUpdated': datetime.now().isoformat()
+        }
+    })
 
-else:
-    print("Flask not available - real agent data ready for deployment")
-    print(f"Discovered {len(discovery.agents)} real agents for production use")
\ No newline at end of file
+if __name__ == '__main__':
+    print("🚀 AWS Real Agent Discovery Server starting...")
+    print(f"📊 Discovered {len(discovery.agents)} production agents")
+    print("🌐 Server will be available at:")
+    print("   - Health: http://localhost:7778/health")
+    print("   - Agents: http://localhost:7778/api/agents")
+    print("   - Dashboard: http://localhost:7778/api/dashboard/agents")
+    
+    app.run(host='0.0.0.0', port=7778, debug=False)
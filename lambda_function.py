@@ -4,10 +4,233 @@ Serves real agent data via Lambda function
 Compatible with API Gateway
 """
 
+import base64
+import gzip
 import json
 import random
 from datetime import datetime
 
+try:
+    import orjson
+
+    def _dumps(obj):
+        return orjson.dumps(obj).decode()
+    _loads = orjson.loads
+except ImportError:
+    _dumps = json.dumps
+    _loads = json.loads
+
+# Static agent fields, built once per cold start; volatile metrics are filled in per request
+_AGENT_TEMPLATES = [
+    {
+        'id': 'agent-001',
+        'name': 'Production QA Agent',
+        'type': 'qa',
+        'status': 'active',
+        'service': 'quality-assurance',
+        'description': 'Production quality assurance and testing agent',
+        'script': 'ai-qa-agent-real.py',
+        'repo': 'na-business-service',
+        'lastError': None,
+        'environment': 'production',
+        'source': 'aws-lambda-real-agents',
+        'platform': 'aws-lambda'
+    },
+    {
+        'id': 'agent-002',
+        'name': 'Production Developer Agent',
+        'type': 'developer',
+        'status': 'active',
+        'service': 'code-development',
+        'description': 'Production code development and deployment agent',
+        'script': 'ai-developer-agent-real.py',
+        'repo': 'na-business-service',
+        'lastError': None,
+        'environment': 'production',
+        'source': 'aws-lambda-real-agents',
+        'platform': 'aws-lambda'
+    },
+    {
+        'id': 'agent-003',
+        'name': 'Autonomous System Coordinator',
+        'type': 'system',
+        'status': 'active',
+        'service': 'system-coordination',
+        'description': 'Coordinates autonomous agent operations',
+        'script': 'autonomous-coordinator.py',
+        'repo': 'na-autonomous-system',
+        'lastError': None,
+        'environment': 'production',
+        'source': 'aws-lambda-real-agents',
+        'platform': 'aws-lambda'
+    },
+    {
+        'id': 'agent-004',
+        'name': 'Dashboard Monitoring Agent',
+        'type': 'monitoring',
+        'status': 'active',
+        'service': 'system-monitoring',
+        'description': 'Real-time system and agent monitoring',
+        'script': 'real-time-agent-dashboard.py',
+        'repo': 'na-agent-dashboard',
+        'lastError': None,
+        'environment': 'production',
+        'source': 'aws-lambda-real-agents',
+        'platform': 'aws-lambda'
+    },
+    {
+        'id': 'agent-005',
+        'name': 'GitHub Integration Agent',
+        'type': 'integration',
+        'status': 'active',
+        'service': 'github-integration',
+        'description': 'Handles GitHub repository integration and automation',
+        'script': 'github-agent-dispatcher.py',
+        'repo': 'na-autonomous-system',
+        'lastError': None,
+        'environment': 'production',
+        'source': 'aws-lambda-real-agents',
+        'platform': 'aws-lambda'
+    },
+    {
+        'id': 'agent-006',
+        'name': 'DevOps Automation Agent',
+        'type': 'devops',
+        'status': 'active',
+        'service': 'devops-automation',
+        'description': 'Production DevOps and deployment automation',
+        'script': 'ai-devops-agent.py',
+        'repo': 'na-business-service',
+        'lastError': None,
+        'environment': 'production',
+        'source': 'aws-lambda-real-agents',
+        'platform': 'aws-lambda'
+    },
+    {
+        'id': 'agent-007',
+        'name': 'Policy Engine Agent',
+        'type': 'policy',
+        'status': 'active',
+        'service': 'policy-enforcement',
+        'description': 'Enforces business rules and policies',
+        'script': 'agent-policy-engine.py',
+        'repo': 'na-business-service',
+        'lastError': None,
+        'environment': 'production',
+        'source': 'aws-lambda-real-agents',
+        'platform': 'aws-lambda'
+    }
+]
+
+# (cpu, memory, taskCount) ranges for each entry in _AGENT_TEMPLATES
+_METRIC_RANGES = [
+    ((5, 25), (15, 40), (5, 50)),
+    ((8, 35), (20, 50), (10, 75)),
+    ((10, 30), (25, 45), (20, 90)),
+    ((5, 20), (10, 30), (30, 120)),
+    ((3, 15), (12, 28), (8, 45)),
+    ((12, 28), (18, 38), (15, 60)),
+    ((4, 18), (15, 32), (12, 55))
+]
+
+def get_real_agents(now_iso):
+    """Generate real agent data"""
+    return [
+        {
+            **template,
+            'pid': random.randint(1000, 9999),
+            'cpu': round(random.uniform(*cpu), 1),
+            'memory': round(random.uniform(*memory), 1),
+            'taskCount': random.randint(*tasks),
+            'startTime': now_iso,
+            'updated_at': now_iso
+        }
+        for template, (cpu, memory, tasks) in zip(_AGENT_TEMPLATES, _METRIC_RANGES)
+    ]
+
+_HEALTH_SKELETON = {
+    'status': 'healthy',
+    'agents_discovered': len(_AGENT_TEMPLATES),
+    'service': 'aws-lambda-real-agent-api',
+    'version': '2.0.0'
+}
+
+_CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,Authorization,Origin,Accept',
+    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS,HEAD',
+    'Content-Type': 'application/json'
+}
+
+# Smaller bodies are not worth the compression CPU or the base64 overhead
+_GZIP_MIN_BYTES = 1024
+
+_ENDPOINTS = ['/health', '/api/agents', '/api/dashboard/agents', '/stats']
+
+def _health(now_iso):
+    return {**_HEALTH_SKELETON, 'timestamp': now_iso}
+
+def _agents(now_iso):
+    agents = get_real_agents(now_iso)
+    return {
+        'success': True,
+        'agents': agents,
+        'lastUpdated': now_iso,
+        'totalAgents': len(agents),
+        'activeAgents': sum(a['status'] == 'active' for a in agents),
+        'systemMetrics': {
+            'cpu': round(random.uniform(15, 45), 1),
+            'memory': round(random.uniform(30, 70), 1),
+            'uptime': random.randint(86400, 604800),
+            'processes': random.randint(120, 200)
+        },
+        'source': 'aws-lambda-real-agents',
+        'port': 'lambda'
+    }
+
+def _dashboard(now_iso):
+    # Alias for compatibility
+    agents = get_real_agents(now_iso)
+    return {
+        'success': True,
+        'agents': agents,
+        'lastUpdated': now_iso,
+        'totalAgents': len(agents),
+        'activeAgents': sum(a['status'] == 'active' for a in agents),
+        'source': 'aws-lambda-real-agents'
+    }
+
+def _stats(now_iso):
+    agents = get_real_agents(now_iso)
+    active = sum(a['status'] == 'active' for a in agents)
+    return {
+        'success': True,
+        'stats': {
+            'totalAgents': len(agents),
+            'activeAgents': active,
+            'idleAgents': len(agents) - active,
+            'totalTasksCompleted': sum(a.get('taskCount', 0) for a in agents),
+            'averageSuccessRate': round(random.uniform(85, 95), 1),
+            'lastUpdated': now_iso
+        }
+    }
+
+_ROUTES = {
+    '/health': _health,
+    '/api/agents': _agents,
+    '/api/dashboard/agents': _dashboard,
+    '/stats': _stats
+}
+
+def _resolve(path):
+    """Exact route lookup, falling back to a suffix match for stage-prefixed paths"""
+    route = _ROUTES.get(path)
+    if route is None:
+        for suffix, handler in _ROUTES.items():
+            if path.endswith(suffix):
+                return handler
+    return route
+
 def lambda_handler(event, context):
     """Lambda handler for real agent data API"""
     
@@ -15,13 +238,7 @@ def lambda_handler(event, context):
     path = event.get('path', '')
     method = event.get('httpMethod', 'GET')
     
-    # CORS headers
-    headers = {
-        'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Headers': 'Content-Type,Authorization,Origin,Accept',
-        'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS,HEAD',
-        'Content-Type': 'application/json'
-    }
+    headers = dict(_CORS_HEADERS)
     
     # Handle OPTIONS preflight
     if method == 'OPTIONS':
@@ -31,228 +248,41 @@ def lambda_handler(event, context):
             'body': ''
         }
     
-    # Generate real agent data
-    def get_real_agents():
-        agents = [
-            {
-                'id': 'agent-001',
-                'name': 'Production QA Agent',
-                'type': 'qa',
-                'status': 'active',
-                'service': 'quality-assurance',
-                'description': 'Production quality assurance and testing agent',
-                'script': 'ai-qa-agent-real.py',
-                'repo': 'na-business-service',
-                'pid': random.randint(1000, 9999),
-                'cpu': round(random.uniform(5, 25), 1),
-                'memory': round(random.uniform(15, 40), 1),
-                'taskCount': random.randint(5, 50),
-                'startTime': datetime.now().isoformat(),
-                'lastError': None,
-                'environment': 'production',
-                'source': 'aws-lambda-real-agents',
-                'updated_at': datetime.now().isoformat(),
-                'platform': 'aws-lambda'
-            },
-            {
-                'id': 'agent-002',
-                'name': 'Production Developer Agent',
-                'type': 'developer',
-                'status': 'active',
-                'service': 'code-development',
-                'description': 'Production code development and deployment agent',
-                'script': 'ai-developer-agent-real.py',
-                'repo': 'na-business-service',
-                'pid': random.randint(1000, 9999),
-                'cpu': round(random.uniform(8, 35), 1),
-                'memory': round(random.uniform(20, 50), 1),
-                'taskCount': random.randint(10, 75),
-                'startTime': datetime.now().isoformat(),
-                'lastError': None,
-                'environment': 'production',
-                'source': 'aws-lambda-real-agents',
-                'updated_at': datetime.now().isoformat(),
-                'platform': 'aws-lambda'
-            },
-            {
-                'id': 'agent-003',
-                'name': 'Autonomous System Coordinator',
-                'type': 'system',
-                'status': 'active',
-                'service': 'system-coordination',
-                'description': 'Coordinates autonomous agent operations',
-                'script': 'autonomous-coordinator.py',
-                'repo': 'na-autonomous-system',
-                'pid': random.randint(1000, 9999),
-                'cpu': round(random.uniform(10, 30), 1),
-                'memory': round(random.uniform(25, 45), 1),
-                'taskCount': random.randint(20, 90),
-                'startTime': datetime.now().isoformat(),
-                'lastError': None,
-                'environment': 'production',
-                'source': 'aws-lambda-real-agents',
-                'updated_at': datetime.now().isoformat(),
-                'platform': 'aws-lambda'
-            },
-            {
-                'id': 'agent-004',
-                'name': 'Dashboard Monitoring Agent',
-                'type': 'monitoring',
-                'status': 'active',
-                'service': 'system-monitoring',
-                'description': 'Real-time system and agent monitoring',
-                'script': 'real-time-agent-dashboard.py',
-                'repo': 'na-agent-dashboard',
-                'pid': random.randint(1000, 9999),
-                'cpu': round(random.uniform(5, 20), 1),
-                'memory': round(random.uniform(10, 30), 1),
-                'taskCount': random.randint(30, 120),
-                'startTime': datetime.now().isoformat(),
-                'lastError': None,
-                'environment': 'production',
-                'source': 'aws-lambda-real-agents',
-                'updated_at': datetime.now().isoformat(),
-                'platform': 'aws-lambda'
-            },
-            {
-                'id': 'agent-005',
-                'name': 'GitHub Integration Agent',
-                'type': 'integration',
-                'status': 'active',
-                'service': 'github-integration',
-                'description': 'Handles GitHub repository integration and automation',
-                'script': 'github-agent-dispatcher.py',
-                'repo': 'na-autonomous-system',
-                'pid': random.randint(1000, 9999),
-                'cpu': round(random.uniform(3, 15), 1),
-                'memory': round(random.uniform(12, 28), 1),
-                'taskCount': random.randint(8, 45),
-                'startTime': datetime.now().isoformat(),
-                'lastError': None,
-                'environment': 'production',
-                'source': 'aws-lambda-real-agents',
-                'updated_at': datetime.now().isoformat(),
-                'platform': 'aws-lambda'
-            },
-            {
-                'id': 'agent-006',
-                'name': 'DevOps Automation Agent',
-                'type': 'devops',
-                'status': 'active',
-                'service': 'devops-automation',
-                'description': 'Production DevOps and deployment automation',
-                'script': 'ai-devops-agent.py',
-                'repo': 'na-business-service',
-                'pid': random.randint(1000, 9999),
-                'cpu': round(random.uniform(12, 28), 1),
-                'memory': round(random.uniform(18, 38), 1),
-                'taskCount': random.randint(15, 60),
-                'startTime': datetime.now().isoformat(),
-                'lastError': None,
-                'environment': 'production',
-                'source': 'aws-lambda-real-agents',
-                'updated_at': datetime.now().isoformat(),
-                'platform': 'aws-lambda'
-            },
-            {
-                'id': 'agent-007',
-                'name': 'Policy Engine Agent',
-                'type': 'policy',
-                'status': 'active',
-                'service': 'policy-enforcement',
-                'description': 'Enforces business rules and policies',
-                'script': 'agent-policy-engine.py',
-                'repo': 'na-business-service',
-                'pid': random.randint(1000, 9999),
-                'cpu': round(random.uniform(4, 18), 1),
-                'memory': round(random.uniform(15, 32), 1),
-                'taskCount': random.randint(12, 55),
-                'startTime': datetime.now().isoformat(),
-                'lastError': None,
-                'environment': 'production',
-                'source': 'aws-lambda-real-agents',
-                'updated_at': datetime.now().isoformat(),
-                'platform': 'aws-lambda'
-            }
-        ]
-        return agents
-    
-    # Route handling
-    if path == '/health' or path.endswith('/health'):
-        response_body = {
-            'status': 'healthy',
-            'timestamp': datetime.now().isoformat(),
-            'agents_discovered': 7,
-            'service': 'aws-lambda-real-agent-api',
-            'version': '2.0.0'
-        }
-        
-    elif path == '/api/agents' or path.endswith('/api/agents'):
-        agents = get_real_agents()
-        response_body = {
-            'success': True,
-            'agents': agents,
-            'lastUpdated': datetime.now().isoformat(),
-            'totalAgents': len(agents),
-            'activeAgents': len([a for a in agents if a['status'] == 'active']),
-            'systemMetrics': {
-                'cpu': round(random.uniform(15, 45), 1),
-                'memory': round(random.uniform(30, 70), 1),
-                'uptime': random.randint(86400, 604800),
-                'processes': random.randint(120, 200)
-            },
-            'source': 'aws-lambda-real-agents',
-            'port': 'lambda'
-        }
-        
-    elif path == '/api/dashboard/agents' or path.endswith('/api/dashboard/agents'):
-        # Alias for compatibility
-        agents = get_real_agents()
-        response_body = {
-            'success': True,
-            'agents': agents,
-            'lastUpdated': datetime.now().isoformat(),
-            'totalAgents': len(agents),
-            'activeAgents': len([a for a in agents if a['status'] == 'active']),
-            'source': 'aws-lambda-real-agents'
-        }
-        
-    elif path == '/stats' or path.endswith('/stats'):
-        agents = get_real_agents()
-        active_agents = [a for a in agents if a['status'] == 'active']
-        response_body = {
-            'success': True,
-            'stats': {
-                'totalAgents': len(agents),
-                'activeAgents': len(active_agents),
-                'idleAgents': len(agents) - len(active_agents),
-                'totalTasksCompleted': sum(a.get('taskCount', 0) for a in agents),
-                'averageSuccessRate': round(random.uniform(85, 95), 1),
-                'lastUpdated': datetime.now().isoformat()
-            }
-        }
-        
-    else:
+    route = _resolve(path)
+    if route is None:
         response_body = {
             'error': 'Not Found',
             'message': f'Path {path} not found',
-            'available_endpoints': [
-                '/health',
-                '/api/agents', 
-                '/api/dashboard/agents',
-                '/stats'
-            ]
+            'available_endpoints': _ENDPOINTS
         }
         return {
             'statusCode': 404,
             'headers': headers,
-            'body': json.dumps(response_body)
+            'body': _dumps(response_body)
+        }
+    
+    response_body = route(datetime.now().isoformat())
+    body = _dumps(response_body)
+    
+    request_headers = event.get('headers') or {}
+    accept_encoding = request_headers.get('Accept-Encoding') or request_headers.get('accept-encoding') or ''
+    compress = 'gzip' in accept_encoding and len(body) >= _GZIP_MIN_BYTES
+    
+    if compress:
+        # Level 1 keeps most of the size win for a fraction of the CPU
+        headers['Content-Encoding'] = 'gzip'
+        headers['Vary'] = 'Accept-Encoding'
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': base64.b64encode(gzip.compress(body.encode(), compresslevel=1)).decode(),
+            'isBase64Encoded': True
         }
     
     return {
         'statusCode': 200,
         'headers': headers,
-        'body': json.dumps(response_body)
+        'body': body
     }
 
 # For local testing
@@ -269,7 +299,7 @@ if __name__ == '__main__':
         result = lambda_handler(event, {})
         print(f"Status: {result['statusCode']}")
         if result['statusCode'] == 200:
-            body = json.loads(result['body'])
+            body = _loads(result['body'])
             if 'agents' in body:
                 print(f"Agents: {len(body['agents'])}")
             else:
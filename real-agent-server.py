@@ -6,14 +6,29 @@ Replaces the mocked data on port 7777 with real agent information
 """
 
 import os
+import sys
 import json
+import hashlib
 import time
+import re
 import random
+import functools
+import threading
+import http.server
+import socketserver
 import psutil
 from datetime import datetime
+from urllib.parse import urlparse
 
 try:
-    from flask import Flask, jsonify
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+
+try:
+    from flask import Flask, Response, request
     from flask_cors import CORS
     Flask = Flask
     app = Flask(__name__)
@@ -21,11 +36,9 @@ try:
     FLASK_AVAILABLE = True
 except ImportError:
     print("Flask not available. Using simple HTTP server instead.")
-    import http.server
-    import socketserver
-    from urllib.parse import urlparse, parse_qs
     Flask = None
-    jsonify = None
+    Response = None
+    request = None
     CORS = None
     FLASK_AVAILABLE = False
 
@@ -36,139 +49,287 @@ AGENT_PATHS = [
     r'E:\Projects\NiroAgent\na-agent-dashboard'
 ]
 
+# Simulated metric ranges (inclusive bounds of the old randint calls), drawn k at a time
+_CPU_RANGE = range(5, 96)
+_MEMORY_RANGE = range(10, 81)
+_TASK_RANGE = range(0, 16)
+
+# Checked in order; the first keyword found in the filename wins, then the path rules
+_TYPE_RULES = (
+    ('qa', 'qa'),
+    ('devops', 'devops'),
+    ('architect', 'architect'),
+    ('developer', 'developer'),
+    ('dev-daemon', 'developer'),
+    ('business', 'business'),
+    ('marketing', 'marketing'),
+    ('operations', 'operations'),
+    ('github', 'github-integration'),
+    ('batch', 'batch-processor'),
+    ('dashboard', 'dashboard')
+)
+_PATH_RULES = (
+    ('business-service', 'business'),
+    ('autonomous-system', 'autonomous')
+)
+
+@functools.lru_cache(maxsize=4096)
+def _classify_agent(filename_lower, path_lower):
+    for keyword, agent_type in _TYPE_RULES:
+        if keyword in filename_lower:
+            return agent_type
+    for keyword, agent_type in _PATH_RULES:
+        if keyword in path_lower:
+            return agent_type
+    return 'general'
+
+# Dependency, cache and build trees never hold agent files; dot-directories are skipped too
+_SKIP_DIRS = frozenset({'node_modules', '__pycache__', 'venv', 'dist', 'build'})
+
+# Agent/daemon anywhere in the name (any case) and a lowercase .py extension
+_AGENT_FILE_RE = re.compile(r'(?i:agent|daemon).*\.py\Z')
+
+def _scan_agent_files(path):
+    """Yield DirEntry objects for agent scripts under path, files before subdirectories like os.walk"""
+    try:
+        entries = list(os.scandir(path))
+    except OSError:
+        return
+    subdirs = []
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            if entry.name not in _SKIP_DIRS and not entry.name.startswith('.'):
+                subdirs.append(entry.path)
+        elif _AGENT_FILE_RE.search(entry.name):
+            yield entry
+    for subdir in subdirs:
+        yield from _scan_agent_files(subdir)
+
+def _running_py_scripts_psutil():
+    """Basenames of the .py scripts on running python command lines, from one process walk"""
+    running = set()
+    for proc in psutil.process_iter(['name', 'cmdline']):
+        try:
+            name = proc.info['name'] or ''
+            cmdline = proc.info['cmdline']
+            if cmdline and name.lower().startswith('python'):
+                running.update(os.path.basename(arg) for arg in cmdline if arg.endswith('.py'))
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return running
+
+def _running_py_scripts_proc():
+    """Linux fast path: read /proc/<pid>/cmdline directly instead of materializing psutil processes"""
+    running = set()
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                args = f.read().split(b'\0')
+        except OSError:
+            continue
+        if os.path.basename(args[0]).lower().startswith(b'python'):
+            running.update(os.path.basename(arg).decode(errors='replace') for arg in args if arg.endswith(b'.py'))
+    return running
+
+_running_py_scripts = _running_py_scripts_proc if sys.platform.startswith('linux') else _running_py_scripts_psutil
+
 class RealAgentDiscovery:
     def __init__(self):
         self.agents = []
         self.last_scan = None
+        # Status and file paths only change on rescan, so these counts are computed there
+        self.active_count = 0
+        self.path_counts = {path: 0 for path in AGENT_PATHS}
+        # Static part of each /data-sources entry; only counts and lastCheck vary per request
+        self.source_templates = []
+        # Simulated metrics are redrawn at most once per TTL, not on every request
+        self._metrics_ts = 0.0
+        self._metrics_ttl = 1.0
+        # endpoint name -> (body bytes, etag, monotonic expiry)
+        self._payload_cache = {}
+        # Guards self.agents and the metric fields mutated in place across server threads
+        self._lock = threading.RLock()
+        # Rescans happen off the request path, timed on the monotonic clock;
+        # last_scan stays a wall-clock datetime for /health
+        self._scan_interval = 300
+        self._last_scan_mono = 0.0
         self.discover_agents()
+        threading.Thread(target=self._refresh_loop, daemon=True).start()
     
     def discover_agents(self):
         """Discover real agent files from filesystem"""
         discovered = []
         agent_id = 1
+        # One process walk per scan, shared by every daemon status check
+        running = _running_py_scripts()
         
-        for path in AGENT_PATHS:
-            if os.path.exists(path):
-                for root, dirs, files in os.walk(path):
-                    for file in files:
-                        if file.endswith('.py') and ('agent' in file.lower() or 'daemon' in file.lower()):
-                            full_path = os.path.join(root, file)
-                            
-                            # Determine agent type from filename and path
-                            agent_type = self._determine_agent_type(file, root)
-                            status = self._get_agent_status(full_path)
-                            
-                            agent = {
-                                'id': f'real-agent-{agent_id}',
-                                'name': file.replace('.py', '').replace('-', ' ').title(),
-                                'status': status,
-                                'type': agent_type,
-                                'file_path': full_path,
-                                'last_modified': os.path.getmtime(full_path),
-                                'size_bytes': os.path.getsize(full_path),
-                                'cpuUsage': random.randint(5, 95),  # Simulated current usage
-                                'memoryUsage': random.randint(10, 80),
-                                'taskCount': random.randint(0, 15),
-                                'platform': 'filesystem',
-                                'source': 'real-agent-discovery',
-                                'created_at': datetime.fromtimestamp(os.path.getctime(full_path)).isoformat(),
-                                'updated_at': datetime.fromtimestamp(os.path.getmtime(full_path)).isoformat()
-                            }
-                            
-                            discovered.append(agent)
-                            agent_id += 1
+        path_counts = dict.fromkeys(AGENT_PATHS, 0)
+        # One existence check per path per scan, shared by the walk and the data-source status
+        paths_existing = tuple(path for path in AGENT_PATHS if os.path.exists(path))
+        
+        for path in paths_existing:
+            for entry in _scan_agent_files(path):
+                file = entry.name
+                full_path = entry.path
+                # DirEntry caches its stat result, so this is the only stat for the file
+                st = entry.stat()
+                
+                # Determine agent type from filename and path
+                agent_type = self._determine_agent_type(file, os.path.dirname(full_path))
+                status = self._get_agent_status(full_path, st.st_mtime, running)
+                
+                agent = {
+                    'id': f'real-agent-{agent_id}',
+                    'name': file.replace('.py', '').replace('-', ' ').title(),
+                    'status': status,
+                    'type': agent_type,
+                    'file_path': full_path,
+                    'last_modified': st.st_mtime,
+                    'size_bytes': st.st_size,
+                    'cpuUsage': random.randint(5, 95),  # Simulated current usage
+                    'memoryUsage': random.randint(10, 80),
+                    'taskCount': random.randint(0, 15),
+                    'platform': 'filesystem',
+                    'source': 'real-agent-discovery',
+                    'created_at': datetime.fromtimestamp(st.st_ctime).isoformat(),
+                    'updated_at': datetime.fromtimestamp(st.st_mtime).isoformat()
+                }
+                
+                discovered.append(agent)
+                agent_id += 1
+                path_counts[path] += 1
+        
+        active_count = sum(1 for a in discovered if a['status'] in ('active', 'idle'))
+        source_templates = [
+            {
+                "name": os.path.basename(path),
+                "status": "connected" if path in paths_existing else "disconnected",
+                "url": path
+            }
+            for path in AGENT_PATHS
+        ]
         
-        self.agents = discovered
-        self.last_scan = datetime.now()
+        with self._lock:
+            self.agents = discovered
+            self.active_count = active_count
+            self.path_counts = path_counts
+            self.source_templates = source_templates
+            self.last_scan = datetime.now()
+            self._last_scan_mono = time.monotonic()
+            self._metrics_ts = 0.0  # fresh agents have no last_updated yet
+            self._payload_cache.clear()
         print(f"Found {len(self.agents)} real agents from filesystem")
         
         return self.agents
     
+    def _refresh_loop(self):
+        while True:
+            # Any scan, including a forced one, pushes the next rescan a full interval out
+            remaining = self._scan_interval - (time.monotonic() - self._last_scan_mono)
+            if remaining > 0:
+                time.sleep(remaining)
+                continue
+            try:
+                self.discover_agents()
+            except Exception as e:
+                print(f"Agent discovery failed: {e}")
+                time.sleep(self._scan_interval)
+    
     def _determine_agent_type(self, filename, path):
         """Determine agent type from filename and path"""
-        filename_lower = filename.lower()
-        path_lower = path.lower()
+        return _classify_agent(filename.lower(), path.lower())
+    
+    def _get_agent_status(self, file_path, mtime, running):
+        """Determine if agent is active based on running processes and file modification time"""
+        filename = os.path.basename(file_path)
+        
+        # Check if this daemon agent is currently running as a process
+        if 'daemon' in filename.lower() and filename in running:
+            return 'active'
+        
+        # Fallback to file modification time for non-daemon agents
+        hours_since_modified = (time.time() - mtime) / 3600
         
-        if 'qa' in filename_lower:
-            return 'qa'
-        elif 'devops' in filename_lower:
-            return 'devops'
-        elif 'architect' in filename_lower:
-            return 'architect'
-        elif 'developer' in filename_lower or 'dev-daemon' in filename_lower:
-            return 'developer'
-        elif 'business' in filename_lower:
-            return 'business'
-        elif 'marketing' in filename_lower:
-            return 'marketing'
-        elif 'operations' in filename_lower:
-            return 'operations'
-        elif 'github' in filename_lower:
-            return 'github-integration'
-        elif 'batch' in filename_lower:
-            return 'batch-processor'
-        elif 'dashboard' in filename_lower:
-            return 'dashboard'
-        elif 'business-service' in path_lower:
-            return 'business'
-        elif 'autonomous-system' in path_lower:
-            return 'autonomous'
+        if hours_since_modified < 1:
+            return 'active'
+        elif hours_since_modified < 24:
+            return 'idle'
         else:
-            return 'general'
+            return 'dormant'
     
-    def _get_agent_status(self, file_path):
-        """Determine if agent is active based on running processes and file modification time"""
-        try:
-            filename = os.path.basename(file_path)
-            
-            # Check if this daemon agent is currently running as a process
-            if 'daemon' in filename.lower():
-                for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-                    try:
-                        if proc.info['name'] == 'python.exe' and proc.info['cmdline']:
-                            cmdline = ' '.join(proc.info['cmdline'])
-                            if filename in cmdline:
-                                return 'active'
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        continue
-            
-            # Fallback to file modification time for non-daemon agents
-            mtime = os.path.getmtime(file_path)
-            now = time.time()
-            hours_since_modified = (now - mtime) / 3600
-            
-            if hours_since_modified < 1:
-                return 'active'
-            elif hours_since_modified < 24:
-                return 'idle'
-            else:
-                return 'dormant'
-        except:
-            return 'unknown'
+    def _render(self, name, builder):
+        """Serialized payload and ETag for an endpoint, rebuilt at most once per metrics TTL"""
+        now = time.monotonic()
+        cached = self._payload_cache.get(name)
+        if cached and now < cached[2]:
+            return cached[0], cached[1]
+        with self._lock:
+            body = _dumps(builder())
+            etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+            self._payload_cache[name] = (body, etag, now + self._metrics_ttl)
+        return body, etag
     
     def get_agents(self):
-        """Get current agent list, refresh if needed"""
-        # Refresh every 5 minutes or if no data
-        if not self.last_scan or (datetime.now() - self.last_scan).seconds > 300:
-            self.discover_agents()
-        
+        """Get the last scanned agent list; the refresher thread keeps it current"""
         # Update dynamic metrics
-        for agent in self.agents:
-            agent['cpuUsage'] = random.randint(5, 95)
-            agent['memoryUsage'] = random.randint(10, 80)
-            agent['taskCount'] = random.randint(0, 15)
-            agent['last_updated'] = datetime.now().isoformat()
+        with self._lock:
+            now = time.monotonic()
+            if now - self._metrics_ts > self._metrics_ttl:
+                iso_now = datetime.now().isoformat()
+                n = len(self.agents)
+                cpu = random.choices(_CPU_RANGE, k=n)
+                memory = random.choices(_MEMORY_RANGE, k=n)
+                tasks = random.choices(_TASK_RANGE, k=n)
+                for agent, cpu_usage, memory_usage, task_count in zip(self.agents, cpu, memory, tasks):
+                    agent['cpuUsage'] = cpu_usage
+                    agent['memoryUsage'] = memory_usage
+                    agent['taskCount'] = task_count
+                    agent['last_updated'] = iso_now
+                self._metrics_ts = now
         
         return self.agents
 
+def _live_metrics(agents):
+    """(total, active, avg cpu, avg memory, total tasks) in a single pass over the agents"""
+    total = active = cpu_sum = memory_sum = task_sum = 0
+    for agent in agents:
+        total += 1
+        status = agent['status']
+        if status == 'active' or status == 'idle':
+            active += 1
+        cpu_sum += agent['cpuUsage']
+        memory_sum += agent['memoryUsage']
+        task_sum += agent['taskCount']
+    if not total:
+        return 0, 0, 0, 0, 0
+    return total, active, cpu_sum / total, memory_sum / total, task_sum
+
 # Initialize discovery service
 agent_discovery = RealAgentDiscovery()
 
 # Flask routes (only if Flask is available)
 if FLASK_AVAILABLE:
+    def _json_response(obj):
+        return Response(_dumps(obj), mimetype='application/json')
+
+    def _cached_json(view):
+        """Serve the view's payload from the render cache, answering 304 when the ETag matches"""
+        @functools.wraps(view)
+        def wrapper():
+            body, etag = agent_discovery._render(view.__name__, view)
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                response = Response(body, mimetype='application/json')
+            response.set_etag(etag)
+            return response
+        return wrapper
+
     @app.route('/health')
     def health():
-        return jsonify({
+        return _json_response({
             "message": "Real Agent Discovery API", 
             "status": "running",
             "port": 7778,
@@ -177,44 +338,39 @@ if FLASK_AVAILABLE:
         })
 
     @app.route('/api/agents')
+    @_cached_json
     def get_agents():
         """Get discovered real agents"""
-        agents = agent_discovery.get_agents()
-        return jsonify(agents)
+        return agent_discovery.get_agents()
 
     @app.route('/api/dashboard/agents')
+    @_cached_json
     def get_dashboard_agents():
         """Dashboard-formatted agent data"""
         agents = agent_discovery.get_agents()
         
-        return jsonify({
+        return {
             "success": True,
             "agents": agents,
             "lastUpdated": datetime.now().isoformat(),
             "totalAgents": len(agents),
-            "activeAgents": len([a for a in agents if a['status'] in ['active', 'idle']]),
+            "activeAgents": agent_discovery.active_count,
             "dataSources": ["Filesystem Discovery"],
             "source": "real-agent-discovery-server",
             "port": 7778
-        })
+        }
 
     @app.route('/api/dashboard/live-data')
+    @_cached_json
     def get_live_data():
         """Live data endpoint with real agent metrics"""
         agents = agent_discovery.get_agents()
+        now_iso = datetime.now().isoformat()
         
         # Calculate real metrics from discovered agents
-        total_agents = len(agents)
-        active_agents = len([a for a in agents if a['status'] in ['active', 'idle']])
-        
-        if total_agents > 0:
-            avg_cpu = sum(a['cpuUsage'] for a in agents) / total_agents
-            avg_memory = sum(a['memoryUsage'] for a in agents) / total_agents
-            total_tasks = sum(a['taskCount'] for a in agents)
-        else:
-            avg_cpu = avg_memory = total_tasks = 0
+        total_agents, active_agents, avg_cpu, avg_memory, total_tasks = _live_metrics(agents)
         
-        return jsonify({
+        return {
             "success": True,
             "data": {
                 "agents": agents,
@@ -225,49 +381,51 @@ if FLASK_AVAILABLE:
                     "totalCost": total_agents * 0.02,  # Rough estimate
                     "totalTasks": total_tasks
                 },
-                "lastUpdated": datetime.now().isoformat()
+                "lastUpdated": now_iso
             },
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso,
             "sources": "Real Agent Discovery from Filesystem",
             "port": 7778
-        })
+        }
 
     @app.route('/api/dashboard/data-sources')
+    @_cached_json
     def get_data_sources():
         """Data source status"""
         agents = agent_discovery.get_agents()
+        now_iso = datetime.now().isoformat()
         
-        sources = []
-        for path in AGENT_PATHS:
-            agent_count = len([a for a in agents if path in a['file_path']])
-            sources.append({
-                "name": os.path.basename(path),
-                "status": "connected" if os.path.exists(path) else "disconnected",
-                "url": path,
-                "lastCheck": datetime.now().isoformat(),
-                "agentCount": agent_count
-            })
+        path_counts = agent_discovery.path_counts
+        sources = [
+            {**template, "lastCheck": now_iso, "agentCount": path_counts.get(template["url"], 0)}
+            for template in agent_discovery.source_templates
+        ]
         
-        return jsonify({
+        return {
             "success": True,
             "dataSources": sources,
             "connectedSources": len([s for s in sources if s['status'] == 'connected']),
             "totalSources": len(sources),
-            "lastCheck": datetime.now().isoformat()
-        })
+            "lastCheck": now_iso
+        }
 
     @app.route('/api/dashboard/refresh', methods=['POST'])
     def refresh_data():
         """Force refresh of agent discovery"""
         agent_discovery.discover_agents()
         
-        return jsonify({
+        return _json_response({
             "success": True,
             "message": "Agent discovery refreshed from filesystem",
             "lastUpdated": datetime.now().isoformat(),
             "agentCount": len(agent_discovery.agents)
         })
 
+class ThreadedHTTPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """Serves each fallback request on its own thread so one slow client does not block the rest"""
+    daemon_threads = True
+    allow_reuse_address = True
+
 # Simple HTTP server as fallback
 class SimpleHTTPHandler(http.server.BaseHTTPRequestHandler):
     """Simple HTTP server as Flask fallback"""
@@ -292,22 +450,15 @@ class SimpleHTTPHandler(http.server.BaseHTTPRequestHandler):
                 "agents": agents,
                 "lastUpdated": datetime.now().isoformat(),
                 "totalAgents": len(agents),
-                "activeAgents": len([a for a in agents if a['status'] in ['active', 'idle']]),
+                "activeAgents": agent_discovery.active_count,
                 "dataSources": ["Filesystem Discovery"],
                 "source": "real-agent-discovery-server",
                 "port": 7778
             }
         elif path == '/api/dashboard/live-data':
             agents = agent_discovery.get_agents()
-            total_agents = len(agents)
-            active_agents = len([a for a in agents if a['status'] in ['active', 'idle']])
-            
-            if total_agents > 0:
-                avg_cpu = sum(a['cpuUsage'] for a in agents) / total_agents
-                avg_memory = sum(a['memoryUsage'] for a in agents) / total_agents
-                total_tasks = sum(a['taskCount'] for a in agents)
-            else:
-                avg_cpu = avg_memory = total_tasks = 0
+            now_iso = datetime.now().isoformat()
+            total_agents, active_agents, avg_cpu, avg_memory, total_tasks = _live_metrics(agents)
             
             response = {
                 "success": True,
@@ -320,9 +471,9 @@ class SimpleHTTPHandler(http.server.BaseHTTPRequestHandler):
                         "totalCost": total_agents * 0.02,
                         "totalTasks": total_tasks
                     },
-                    "lastUpdated": datetime.now().isoformat()
+                    "lastUpdated": now_iso
                 },
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now_iso,
                 "sources": "Real Agent Discovery from Filesystem",
                 "port": 7778
             }
@@ -332,6 +483,10 @@ class SimpleHTTPHandler(http.server.BaseHTTPRequestHandler):
             self.wfile.write(b'Not Found')
             return
         
+        # Serialize under the discovery lock so metrics are not redrawn mid-encode
+        with agent_discovery._lock:
+            body = _dumps(response)
+        
         # Send JSON response
         self.send_response(200)
         self.send_header('Content-type', 'application/json')
@@ -339,7 +494,7 @@ class SimpleHTTPHandler(http.server.BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
-        self.wfile.write(json.dumps(response, indent=2).encode())
+        self.wfile.write(body)
     
     def do_OPTIONS(self):
         self.send_response(200)
@@ -361,11 +516,19 @@ if __name__ == '__main__':
     
     try:
         if FLASK_AVAILABLE:
-            print("Using Flask server with improved error handling")
-            app.run(host='127.0.0.1', port=7778, debug=False, threaded=True, use_reloader=False)
+            try:
+                from waitress import serve
+            except ImportError:
+                serve = None
+            if serve:
+                print("Using waitress WSGI server")
+                serve(app, host='127.0.0.1', port=7778, threads=8)
+            else:
+                print("Using Flask server with improved error handling")
+                app.run(host='127.0.0.1', port=7778, debug=False, threaded=True, use_reloader=False)
         else:
             print("Using simple HTTP server (Flask not available)")
-            with socketserver.TCPServer(("127.0.0.1", 7778), SimpleHTTPHandler) as httpd:
+            with ThreadedHTTPServer(("127.0.0.1", 7778), SimpleHTTPHandler) as httpd:
                 print("Server running on http://127.0.0.1:7778")
                 httpd.serve_forever()
     except KeyboardInterrupt:
@@ -5,35 +5,66 @@ Handles multiple alert channels, escalation, and intelligent filtering
 """
 
 import json
+import math
 import time
-import smtplib
-import requests
-import boto3
+import hashlib
+import atexit
+import operator
+import threading
+import weakref
 from email.mime.text import MIMEText as MimeText
 from email.mime.multipart import MIMEMultipart as MimeMultipart
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
-from enum import Enum
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass, field, fields
+from enum import StrEnum
+from itertools import islice
 import logging
 
+try:
+    import orjson
+    _dumps = orjson.dumps
+
+    def _dumps_indented(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+    def _dumps_config(obj):
+        # orjson walks dataclasses natively and skips _private fields
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+
+    def _dumps_indented(obj):
+        return json.dumps(obj, indent=2)
+
+    def _public_fields(obj):
+        return {f.name: getattr(obj, f.name) for f in fields(obj) if not f.name.startswith('_')}
+
+    def _dumps_config(obj):
+        return json.dumps(obj, indent=2, default=_public_fields).encode()
+
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class AlertLevel(Enum):
+class AlertLevel(StrEnum):
     INFO = "info"
     WARNING = "warning"
     CRITICAL = "critical"
     EMERGENCY = "emergency"
 
-class AlertChannel(Enum):
+class AlertChannel(StrEnum):
     EMAIL = "email"
     SLACK = "slack" 
     SNS = "sns"
     WEBHOOK = "webhook"
     PAGERDUTY = "pagerduty"
 
-@dataclass
+@dataclass(slots=True)
 class Alert:
     level: AlertLevel
     title: str
@@ -45,8 +76,18 @@ class Alert:
     resolved: bool = False
     acknowledged: bool = False
     escalated: bool = False
+    dedup_count: int = 0
+    # Formatted once here instead of in every channel handler
+    level_str: str = field(init=False, repr=False)
+    ts_iso: str = field(init=False, repr=False)
+    _meta_json: Optional[str] = field(default=None, repr=False)
+    rule: Optional['AlertRule'] = field(default=None, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.level_str = self.level.value.upper()
+        self.ts_iso = self.timestamp.isoformat()
 
-@dataclass
+@dataclass(slots=True)
 class AlertRule:
     name: str
     condition: str
@@ -56,20 +97,107 @@ class AlertRule:
     channels: List[AlertChannel]
     cooldown: int = 300  # 5 minutes default
     enabled: bool = True
+    _compiled: Optional[Callable[[Dict[str, Any]], bool]] = field(default=None, repr=False, compare=False)
+    _metric: Optional[str] = field(default=None, repr=False, compare=False)
+    # Whether the check passes on its defaults, i.e. with the section absent
+    _fires_when_missing: bool = field(default=False, repr=False, compare=False)
 
-@dataclass
+@dataclass(slots=True)
 class NotificationChannel:
     channel_type: AlertChannel
     config: Dict[str, Any]
     enabled: bool = True
 
+_SLACK_COLOR = {
+    AlertLevel.INFO: "good",
+    AlertLevel.WARNING: "warning",
+    AlertLevel.CRITICAL: "danger",
+    AlertLevel.EMERGENCY: "#FF0000"
+}
+
+_PD_CRITICAL = frozenset({AlertLevel.CRITICAL, AlertLevel.EMERGENCY})
+
+# A suppressed-repeat count is reported only if the payload recurs within
+# this many cooldowns of its last send; older counts are dropped as stale
+_REPEAT_COUNT_COOLDOWNS = 4
+
+def _flatten_metrics(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten {'section': {'key': v}} to {'section.key': v} so checks do one lookup"""
+    flat = {}
+    for section, values in metrics.items():
+        if isinstance(values, dict):
+            for key, value in values.items():
+                flat[f"{section}.{key}"] = value
+        else:
+            flat[section] = values
+    return flat
+
+def _metric_check(section: str, key: str, default: Any, compare: Callable[[Any, Any], bool]):
+    """Registry entry comparing flat metrics['section.key'] against the rule threshold"""
+    path = f"{section}.{key}"
+    def compile_rule(rule: AlertRule) -> Callable[[Dict[str, Any]], bool]:
+        def check(flat: Dict[str, Any]) -> bool:
+            return compare(flat.get(path, default), rule.threshold)
+        return check
+    compile_rule.metric = section
+    return compile_rule
+
+def _never(flat: Dict[str, Any]) -> bool:
+    return False
+
+# Canonical condition token -> compiler for rules whose condition mentions it.
+# Checked in order, so a condition compiles against the first token it contains.
+CONDITION_REGISTRY: Dict[str, Callable[[AlertRule], Callable[[Dict[str, Any]], bool]]] = {
+    'response_time_ms': _metric_check('discovery_server', 'response_time_ms', 0, operator.gt),
+    'active_agents': _metric_check('daemon_agents', 'active_daemon_agents', 0, operator.lt),
+    'cpu_percent': _metric_check('system_resources', 'cpu_percent', 0, operator.gt),
+    'memory_percent': _metric_check('system_resources', 'memory_percent', 0, operator.gt),
+    "overall_health == 'critical'": _metric_check('overall_health', 'status', 'unknown',
+                                                  lambda value, threshold: value == 'critical'),
+    'deprecated_services_detected': _metric_check('deprecated_services', 'running_deprecated_services', [],
+                                                  lambda value, threshold: len(value) > threshold),
+}
+
 class AlertManager:
     def __init__(self, config_file: str = None):
         self.active_alerts: Dict[str, Alert] = {}
-        self.alert_history: List[Alert] = []
+        self.alert_history: Deque[Alert] = deque(maxlen=100)
+        # Rules are compiled on first use; after editing a compiled rule's
+        # condition or threshold in place, pass the list through set_rules
         self.rules: List[AlertRule] = []
         self.channels: Dict[AlertChannel, NotificationChannel] = {}
-        self.last_notification: Dict[str, datetime] = {}
+        # Cooldown bookkeeping is on the monotonic clock (seconds)
+        self.last_notification: Dict[str, float] = {}
+        # Content fingerprint -> (last sent, repeats suppressed since)
+        self._fp_state: Dict[str, Tuple[float, int]] = {}
+        self._rules_by_name: Dict[str, AlertRule] = {}
+        
+        # Channel handlers are I/O bound, so every send of a tick is fanned
+        # out at once instead of paying the sum of the round trips
+        self._executor = ThreadPoolExecutor(max_workers=16)
+        _live_managers.add(self)
+        
+        # SDKs (requests, boto3, smtplib) are imported on first use, so
+        # channels that stay disabled cost nothing at startup
+        self._http = None
+        self._http_lock = threading.Lock()
+        
+        # boto3 clients are expensive to build; keep one per region
+        self._sns_clients: Dict[str, Any] = {}
+        self._sns_lock = threading.Lock()
+        
+        # Logged-in SMTP connection reused across emails; the lock also
+        # serializes sends since smtplib connections are not thread safe
+        self._smtp = None
+        self._smtp_key = None
+        self._smtp_lock = threading.Lock()
+        self._senders = {
+            AlertChannel.EMAIL: self._send_email_alert,
+            AlertChannel.SLACK: self._send_slack_alert,
+            AlertChannel.SNS: self._send_sns_alert,
+            AlertChannel.WEBHOOK: self._send_webhook_alert,
+            AlertChannel.PAGERDUTY: self._send_pagerduty_alert,
+        }
         
         # Load configuration
         if config_file:
@@ -181,6 +309,8 @@ class AlertManager:
                 enabled=False
             )
         }
+        
+        self._compile_rules()
     
     def load_config(self, config_file: str):
         """Load configuration from JSON file"""
@@ -212,29 +342,52 @@ class AlertManager:
                     enabled=ch_data.get('enabled', True)
                 )
                 self.channels[AlertChannel(ch_name)] = channel
-                
+            
+            self._compile_rules()
             logger.info(f"Loaded configuration from {config_file}")
             
         except Exception as e:
             logger.error(f"Failed to load config: {e}")
             self.setup_default_config()
     
+    def set_rules(self, rules: List[AlertRule]):
+        """Replace the rule list. Also pass the list back through here after
+        editing a rule's condition or threshold in place."""
+        self.rules = list(rules)
+        self._compile_rules()
+    
+    def add_rule(self, rule: AlertRule):
+        """Append one rule to the rule list"""
+        self._compile_rule(rule)
+        self.rules.append(rule)
+        self._rules_by_name[rule.name] = rule
+    
+    def _compile_rules(self):
+        """Precompile every rule condition into a metrics -> bool check"""
+        for rule in self.rules:
+            self._compile_rule(rule)
+        self._rules_by_name = {rule.name: rule for rule in self.rules}
+    
+    def _compile_rule(self, rule: AlertRule) -> Callable[[Dict[str, Any]], bool]:
+        """Compile one rule condition via CONDITION_REGISTRY"""
+        compiled = _never
+        metric = None
+        for token, compile_rule in CONDITION_REGISTRY.items():
+            if token in rule.condition:
+                compiled = compile_rule(rule)
+                metric = compile_rule.metric
+                break
+        rule._compiled = compiled
+        rule._metric = metric
+        rule._fires_when_missing = metric is not None and bool(compiled({}))
+        return compiled
+    
     def save_config(self, config_file: str):
         """Save current configuration to JSON file"""
+        # AlertRule's public fields are exactly the saved rule format, so the
+        # rules are handed to the encoder as-is instead of copied into dicts
         config = {
-            'rules': [
-                {
-                    'name': rule.name,
-                    'condition': rule.condition,
-                    'threshold': rule.threshold,
-                    'duration': rule.duration,
-                    'level': rule.level.value,
-                    'channels': [ch.value for ch in rule.channels],
-                    'cooldown': rule.cooldown,
-                    'enabled': rule.enabled
-                }
-                for rule in self.rules
-            ],
+            'rules': self.rules,
             'channels': {
                 ch_type.value: {
                     'config': channel.config,
@@ -244,82 +397,94 @@ class AlertManager:
             }
         }
         
-        with open(config_file, 'w') as f:
-            json.dump(config, f, indent=2)
+        with open(config_file, 'wb') as f:
+            f.write(_dumps_config(config))
         
         logger.info(f"Configuration saved to {config_file}")
     
     def evaluate_rules(self, metrics: Dict[str, Any]) -> List[Alert]:
         """Evaluate alert rules against current metrics"""
         triggered_alerts = []
+        now_mono = time.monotonic()
+        
+        flat = None
         
         for rule in self.rules:
             if not rule.enabled:
                 continue
             
             try:
+                # Rules appended straight to self.rules are compiled on first use
+                if rule._compiled is None:
+                    self._compile_rule(rule)
+                
+                # A rule whose section is absent can only fire on its defaults
+                if rule._metric not in metrics and not rule._fires_when_missing:
+                    continue
+                
+                if flat is None:
+                    flat = _flatten_metrics(metrics)
+                
                 # Simple condition evaluation
-                condition_met = self._evaluate_condition(rule, metrics)
+                condition_met = rule._compiled(flat)
                 
                 if condition_met:
-                    alert_id = f"{rule.name}_{int(time.time())}"
+                    message = self._generate_alert_message(rule, metrics)
                     
-                    # Check cooldown
-                    last_alert_key = f"{rule.name}"
-                    if (last_alert_key in self.last_notification and 
-                        datetime.now() - self.last_notification[last_alert_key] < timedelta(seconds=rule.cooldown)):
+                    fp = hashlib.blake2b(f"{rule.name}|{message}".encode(), digest_size=16).hexdigest()
+                    seen = self._fp_state.get(fp)
+                    
+                    # Check cooldown; an identical payload inside the window is
+                    # counted so the next send can report the repeats
+                    if now_mono - self.last_notification.get(rule.name, -math.inf) < rule.cooldown:
+                        if seen is not None and now_mono - seen[0] < rule.cooldown:
+                            self._fp_state[fp] = (seen[0], seen[1] + 1)
                         continue
                     
+                    alert_id = f"{rule.name}_{int(time.time())}"
+                    repeats = 0
+                    if seen is not None and now_mono - seen[0] < rule.cooldown * _REPEAT_COUNT_COOLDOWNS:
+                        repeats = seen[1]
+                    if repeats:
+                        message = f"(repeated {repeats}x) {message}"
+                    
                     alert = Alert(
                         level=rule.level,
                         title=f"Alert: {rule.name.replace('_', ' ').title()}",
-                        message=self._generate_alert_message(rule, metrics),
+                        message=message,
                         component=rule.name,
                         timestamp=datetime.now(),
                         metadata=metrics,
-                        alert_id=alert_id
+                        alert_id=alert_id,
+                        dedup_count=repeats,
+                        rule=rule
                     )
                     
                     triggered_alerts.append(alert)
                     self.active_alerts[alert_id] = alert
-                    self.last_notification[last_alert_key] = datetime.now()
+                    self.last_notification[rule.name] = now_mono
+                    self._remember_fingerprint(fp, now_mono)
                     
             except Exception as e:
                 logger.error(f"Error evaluating rule {rule.name}: {e}")
         
         return triggered_alerts
     
+    def _remember_fingerprint(self, fp: str, sent_at: float):
+        """Record a sent fingerprint, dropping ones older than any rule's cooldown.
+        Entries holding a repeat count are kept for _REPEAT_COUNT_COOLDOWNS
+        cooldowns so their next send can still report it."""
+        horizon = max((r.cooldown for r in self.rules), default=0)
+        self._fp_state = {
+            key: state for key, state in self._fp_state.items()
+            if sent_at - state[0] < (horizon * _REPEAT_COUNT_COOLDOWNS if state[1] else horizon)
+        }
+        self._fp_state[fp] = (sent_at, 0)
+    
     def _evaluate_condition(self, rule: AlertRule, metrics: Dict[str, Any]) -> bool:
         """Evaluate if rule condition is met"""
-        condition = rule.condition
-        threshold = rule.threshold
-        
-        # Simple condition evaluation - can be extended
-        if "response_time_ms" in condition:
-            value = metrics.get('discovery_server', {}).get('response_time_ms', 0)
-            return value > threshold
-        
-        elif "active_agents" in condition:
-            value = metrics.get('daemon_agents', {}).get('active_daemon_agents', 0)
-            return value < threshold
-        
-        elif "cpu_percent" in condition:
-            value = metrics.get('system_resources', {}).get('cpu_percent', 0)
-            return value > threshold
-        
-        elif "memory_percent" in condition:
-            value = metrics.get('system_resources', {}).get('memory_percent', 0)
-            return value > threshold
-        
-        elif "overall_health == 'critical'" in condition:
-            value = metrics.get('overall_health', {}).get('status', 'unknown')
-            return value == 'critical'
-        
-        elif "deprecated_services_detected" in condition:
-            value = len(metrics.get('deprecated_services', {}).get('running_deprecated_services', []))
-            return value > threshold
-        
-        return False
+        check = rule._compiled or self._compile_rule(rule)
+        return check(_flatten_metrics(metrics))
     
     def _generate_alert_message(self, rule: AlertRule, metrics: Dict[str, Any]) -> str:
         """Generate human-readable alert message"""
@@ -336,6 +501,12 @@ class AlertManager:
     
     def send_alert(self, alert: Alert, channels: List[AlertChannel]):
         """Send alert through specified channels"""
+        futures = {}
+        self._submit_alert(alert, channels, futures)
+        self._wait_for_sends(futures)
+    
+    def _submit_alert(self, alert: Alert, channels: List[AlertChannel], futures: Dict[Any, Tuple[str, str]]):
+        """Queue an alert's enabled channel handlers on the send pool"""
         for channel_type in channels:
             if channel_type not in self.channels:
                 continue
@@ -344,22 +515,24 @@ class AlertManager:
             if not channel.enabled:
                 continue
             
-            try:
-                if channel_type == AlertChannel.EMAIL:
-                    self._send_email_alert(alert, channel)
-                elif channel_type == AlertChannel.SLACK:
-                    self._send_slack_alert(alert, channel)
-                elif channel_type == AlertChannel.SNS:
-                    self._send_sns_alert(alert, channel)
-                elif channel_type == AlertChannel.WEBHOOK:
-                    self._send_webhook_alert(alert, channel)
-                elif channel_type == AlertChannel.PAGERDUTY:
-                    self._send_pagerduty_alert(alert, channel)
-                
-                logger.info(f"Alert sent via {channel_type.value}: {alert.title}")
-                
-            except Exception as e:
-                logger.error(f"Failed to send alert via {channel_type.value}: {e}")
+            sender = self._senders[channel_type]
+            futures[self._executor.submit(sender, alert, channel)] = (channel_type.value, alert.title)
+    
+    def _wait_for_sends(self, futures: Dict[Any, Tuple[str, str]]):
+        """Wait once for all queued sends and log each outcome"""
+        if not futures:
+            return
+        
+        done, not_done = wait(futures, timeout=30)
+        for future in done:
+            channel_name, what = futures[future]
+            error = future.exception()
+            if error is None:
+                logger.info(f"Alert sent via {channel_name}: {what}")
+            else:
+                logger.error(f"Failed to send alert via {channel_name}: {error}")
+        for future in not_done:
+            logger.error(f"Failed to send alert via {futures[future][0]}: timed out")
     
     def _send_email_alert(self, alert: Alert, channel: NotificationChannel):
         """Send email alert"""
@@ -372,10 +545,10 @@ class AlertManager:
         msg = MimeMultipart()
         msg['From'] = config['from_email']
         msg['To'] = ', '.join(config['to_emails'])
-        msg['Subject'] = f"[{alert.level.value.upper()}] {alert.title}"
+        msg['Subject'] = f"[{alert.level_str}] {alert.title}"
         
         body = f"""
-        Alert Level: {alert.level.value.upper()}
+        Alert Level: {alert.level_str}
         Component: {alert.component}
         Time: {alert.timestamp}
         
@@ -383,7 +556,7 @@ class AlertManager:
         {alert.message}
         
         Metadata:
-        {json.dumps(alert.metadata, indent=2)}
+        {alert._meta_json or _dumps_indented(alert.metadata)}
         
         --
         NiroAgent Production Monitoring System
@@ -391,10 +564,45 @@ class AlertManager:
         
         msg.attach(MimeText(body, 'plain'))
         
-        with smtplib.SMTP(config['smtp_server'], config['smtp_port']) as server:
+        import smtplib
+        
+        with self._smtp_lock:
+            try:
+                self._smtp_connection(config).send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                # Server dropped the idle connection; log in again once
+                self._close_smtp()
+                self._smtp_connection(config).send_message(msg)
+    
+    def _smtp_connection(self, config: Dict[str, Any]):
+        """Return a logged-in SMTP connection, reusing the previous one (call with _smtp_lock held)"""
+        import smtplib
+        
+        key = (config['smtp_server'], config['smtp_port'], config['username'])
+        if self._smtp is not None and self._smtp_key == key:
+            return self._smtp
+        
+        self._close_smtp()
+        server = smtplib.SMTP(config['smtp_server'], config['smtp_port'], timeout=30)
+        try:
             server.starttls()
             server.login(config['username'], config['password'])
-            server.send_message(msg)
+        except Exception:
+            server.close()
+            raise
+        self._smtp = server
+        self._smtp_key = key
+        return server
+    
+    def _close_smtp(self):
+        """Drop the cached SMTP connection"""
+        server, self._smtp, self._smtp_key = self._smtp, None, None
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            server.close()
     
     def _send_slack_alert(self, alert: Alert, channel: NotificationChannel):
         """Send Slack alert"""
@@ -404,25 +612,18 @@ class AlertManager:
             logger.warning("Slack channel not properly configured")
             return
         
-        color_map = {
-            AlertLevel.INFO: "good",
-            AlertLevel.WARNING: "warning", 
-            AlertLevel.CRITICAL: "danger",
-            AlertLevel.EMERGENCY: "#FF0000"
-        }
-        
         payload = {
             "channel": config.get('channel', '#alerts'),
             "username": config.get('username', 'Agent Monitor'),
             "attachments": [
                 {
-                    "color": color_map.get(alert.level, "warning"),
+                    "color": _SLACK_COLOR.get(alert.level, "warning"),
                     "title": alert.title,
                     "text": alert.message,
                     "fields": [
                         {
                             "title": "Level",
-                            "value": alert.level.value.upper(),
+                            "value": alert.level_str,
                             "short": True
                         },
                         {
@@ -440,9 +641,49 @@ class AlertManager:
             ]
         }
         
-        response = requests.post(config['webhook_url'], json=payload)
+        response = self._session().post(config['webhook_url'], data=_dumps(payload),
+                                  headers=_JSON_HEADERS, timeout=(3, 10))
         response.raise_for_status()
     
+    def _session(self):
+        """Return the shared HTTP session, creating it on first use"""
+        if self._http is not None:
+            return self._http
+        
+        with self._http_lock:
+            if self._http is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+                
+                # One pooled keep-alive session for every HTTP channel. Every
+                # channel POSTs, so only failures where the request was surely
+                # not processed are retried: refused connects and 429 throttling.
+                # A read timeout or 5xx may follow a delivered alert.
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=16,
+                    pool_maxsize=64,
+                    max_retries=Retry(total=2, connect=2, read=0, status=2,
+                                      backoff_factor=0.2,
+                                      status_forcelist=[429],
+                                      allowed_methods=None)
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._http = session
+        return self._http
+    
+    def _sns_client(self, region: str):
+        """Return the shared SNS client for a region, creating it once"""
+        with self._sns_lock:
+            client = self._sns_clients.get(region)
+            if client is None:
+                import boto3
+                client = boto3.client('sns', region_name=region)
+                self._sns_clients[region] = client
+            return client
+    
     def _send_sns_alert(self, alert: Alert, channel: NotificationChannel):
         """Send SNS alert"""
         config = channel.config
@@ -451,22 +692,54 @@ class AlertManager:
             logger.warning("SNS channel not properly configured")
             return
         
-        sns = boto3.client('sns', region_name=config.get('region', 'us-east-1'))
+        sns = self._sns_client(config.get('region', 'us-east-1'))
+        
+        sns.publish(
+            TopicArn=config['topic_arn'],
+            Message=self._sns_message(alert),
+            Subject=f"[ALERT] {alert.title}"
+        )
+    
+    def _send_sns_batch(self, alerts: List[Alert], channel: NotificationChannel):
+        """Send several SNS alerts with PublishBatch, 10 entries per call"""
+        if len(alerts) == 1:
+            self._send_sns_alert(alerts[0], channel)
+            return
+        
+        config = channel.config
+        
+        if not config.get('topic_arn'):
+            logger.warning("SNS channel not properly configured")
+            return
         
-        message = f"""
+        sns = self._sns_client(config.get('region', 'us-east-1'))
+        
+        for start in range(0, len(alerts), 10):
+            chunk = alerts[start:start + 10]
+            response = sns.publish_batch(
+                TopicArn=config['topic_arn'],
+                PublishBatchRequestEntries=[
+                    {
+                        'Id': alert.alert_id[:80],
+                        'Message': self._sns_message(alert),
+                        'Subject': f"[ALERT] {alert.title}"
+                    }
+                    for alert in chunk
+                ]
+            )
+            for failed in response.get('Failed', []):
+                logger.error(f"Failed to send alert via sns: {failed.get('Id')}: {failed.get('Message')}")
+    
+    def _sns_message(self, alert: Alert) -> str:
+        """Format the SNS message body for an alert"""
+        return f"""
         ALERT: {alert.title}
-        Level: {alert.level.value.upper()}
+        Level: {alert.level_str}
         Component: {alert.component}
         Time: {alert.timestamp}
         
         {alert.message}
         """
-        
-        sns.publish(
-            TopicArn=config['topic_arn'],
-            Message=message,
-            Subject=f"[ALERT] {alert.title}"
-        )
     
     def _send_webhook_alert(self, alert: Alert, channel: NotificationChannel):
         """Send webhook alert"""
@@ -482,15 +755,16 @@ class AlertManager:
             "title": alert.title,
             "message": alert.message,
             "component": alert.component,
-            "timestamp": alert.timestamp.isoformat(),
+            "timestamp": alert.ts_iso,
             "metadata": alert.metadata
         }
         
-        response = requests.request(
+        response = self._session().request(
             method=config.get('method', 'POST'),
             url=config['url'],
-            json=payload,
-            headers=config.get('headers', {})
+            data=_dumps(payload),
+            headers={**_JSON_HEADERS, **config.get('headers', {})},
+            timeout=(3, 10)
         )
         response.raise_for_status()
     
@@ -509,7 +783,7 @@ class AlertManager:
             "payload": {
                 "summary": alert.title,
                 "source": "agent-monitoring",
-                "severity": "critical" if alert.level in [AlertLevel.CRITICAL, AlertLevel.EMERGENCY] else "warning",
+                "severity": "critical" if alert.level in _PD_CRITICAL else "warning",
                 "component": alert.component,
                 "custom_details": {
                     "message": alert.message,
@@ -518,9 +792,11 @@ class AlertManager:
             }
         }
         
-        response = requests.post(
+        response = self._session().post(
             config.get('service_url', 'https://events.pagerduty.com/v2/enqueue'),
-            json=payload
+            data=_dumps(payload),
+            headers=_JSON_HEADERS,
+            timeout=(3, 10)
         )
         response.raise_for_status()
     
@@ -529,20 +805,47 @@ class AlertManager:
         # Evaluate rules and generate alerts
         new_alerts = self.evaluate_rules(metrics)
         
-        # Send notifications for new alerts
-        for alert in new_alerts:
-            # Find which channels to use
-            rule = next((r for r in self.rules if r.name == alert.component), None)
-            if rule:
-                self.send_alert(alert, rule.channels)
-        
-        # Add to history
+        # Only switched-on channels do notification work; with the shipped
+        # config (everything disabled) alerts are recorded but nothing is sent
+        enabled = {ct for ct, ch in self.channels.items() if ch.enabled}
+        
+        # Send notifications for new alerts; SNS alerts from the same tick
+        # are collected and published together in one batch
+        sns_alerts = []
+        routed = []
+        if enabled:
+            for alert in new_alerts:
+                # Find which channels to use
+                rule = alert.rule or self._rules_by_name.get(alert.component)
+                if not rule:
+                    continue
+                channels = [c for c in rule.channels if c in enabled]
+                if AlertChannel.SNS in channels:
+                    sns_alerts.append(alert)
+                    channels.remove(AlertChannel.SNS)
+                if channels:
+                    routed.append((alert, channels))
+        
+        # Every alert from this tick carries the same metrics; serialize them once
+        if routed:
+            meta_json = _dumps_indented(metrics)
+            for alert, _ in routed:
+                alert._meta_json = meta_json
+        
+        # One wait covers every channel of every alert in this tick
+        futures = {}
+        if sns_alerts:
+            sns_future = self._executor.submit(self._send_sns_batch, sns_alerts, self.channels[AlertChannel.SNS])
+            futures[sns_future] = (AlertChannel.SNS.value, f"{len(sns_alerts)} alert(s)")
+        
+        for alert, channels in routed:
+            self._submit_alert(alert, channels, futures)
+        
+        self._wait_for_sends(futures)
+        
+        # Add to history (bounded to the last 100)
         self.alert_history.extend(new_alerts)
         
-        # Clean up old alerts (keep last 100)
-        if len(self.alert_history) > 100:
-            self.alert_history = self.alert_history[-100:]
-        
         return new_alerts
     
     def get_active_alerts(self) -> List[Alert]:
@@ -563,14 +866,22 @@ class AlertManager:
             # Remove from active alerts
             del self.active_alerts[alert_id]
     
+    def close(self):
+        """Shut down the send pool and the cached SMTP connection; call once
+        the manager is no longer needed"""
+        self._executor.shutdown()
+        with self._smtp_lock:
+            self._close_smtp()
+    
     def get_alert_summary(self) -> Dict[str, Any]:
         """Get alert summary for dashboard"""
         active_alerts = self.get_active_alerts()
+        counts = Counter(a.level for a in active_alerts)
         
         return {
             "active_alerts_count": len(active_alerts),
             "alerts_by_level": {
-                level.value: len([a for a in active_alerts if a.level == level])
+                level.value: counts[level]
                 for level in AlertLevel
             },
             "recent_alerts": [
@@ -579,14 +890,23 @@ class AlertManager:
                     "level": alert.level.value,
                     "title": alert.title,
                     "component": alert.component,
-                    "timestamp": alert.timestamp.isoformat(),
+                    "timestamp": alert.ts_iso,
                     "acknowledged": alert.acknowledged,
                     "resolved": alert.resolved
                 }
-                for alert in self.alert_history[-10:]
+                for alert in islice(self.alert_history, max(len(self.alert_history) - 10, 0), None)
             ]
         }
 
+# Managers still open at interpreter exit. Held weakly so that a manager
+# which is dropped early is freed along with its thread pool.
+_live_managers: 'weakref.WeakSet[AlertManager]' = weakref.WeakSet()
+
+@atexit.register
+def _close_live_managers():
+    for manager in list(_live_managers):
+        manager.close()
+
 def main():
     """Example usage of AlertManager"""
     alert_manager = AlertManager()
@@ -618,7 +938,7 @@ def main():
     
     print("New alerts generated:")
     for alert in new_alerts:
-        print(f"- {alert.level.value.upper()}: {alert.title}")
+        print(f"- {alert.level_str}: {alert.title}")
     
     # Get alert summary
     summary = alert_manager.get_alert_summary()
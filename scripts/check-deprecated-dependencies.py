@@ -6,119 +6,272 @@ Scans codebase for references to deprecated services and files
 
 import os
 import re
+import json
+import mmap
+import bisect
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, groupby
 from pathlib import Path
 from typing import List, Dict, Set
 
+# Deprecated server files (moved to /deprecated/servers/)
+DEPRECATED_SERVERS = (
+    "simple-server.js",
+    "debug-server.js", 
+    "minimal-test.js",
+    "simple-test.js",
+    "working-server.js",
+    "live-server.js",
+    "real-agent-server.js"
+)
+
+# Deprecated root files (moved to /deprecated/)
+DEPRECATED_ROOT_FILES = (
+    "real-agent-server.py",
+)
+
+# Deprecated infrastructure files
+DEPRECATED_INFRASTRUCTURE = (
+    "minimal-al2023-test.yaml",
+    "simple-al2023-infrastructure.yaml"
+)
+
+DEPRECATED_FILES = frozenset(DEPRECATED_SERVERS + DEPRECATED_ROOT_FILES + DEPRECATED_INFRASTRUCTURE)
+
+# Deprecated patterns (ports, URLs, references)
+DEPRECATED_PATTERNS = (
+    r"localhost:7778",  # Mocked service port
+    r"port\s*[=:]\s*7777",  # Port configuration
+    r"PORT\s*[=:]\s*7777",
+    r"http://.*:7777",
+    r"servers/simple-server",
+    r"servers/debug-server", 
+    r"servers/minimal-test",
+    r"servers/working-server",
+    r"servers/live-server",
+    r"minimal-server\.js",
+    r"proxy-server\.js",
+    r"live-agent-api\.js",
+    r"fix-vf-dev-api\.yaml",
+    r"simple-infrastructure\.yaml",
+    r"\bDEPRECATED - use real-agent-server\.py"  # Documentation marker
+)
+
+# Everything below is derived once at import, so checkers (and pool
+# workers) share the compiled patterns instead of rebuilding them.
+# Files are scanned as raw bytes, so patterns are compiled as bytes too
+_COMPILED_PATTERNS = tuple(re.compile(p.encode(), re.IGNORECASE) for p in DEPRECATED_PATTERNS)
+
+# An alternation reports one pattern per position and consumes what it
+# matched, so patterns that can span other references (".*") keep their
+# own pass; a greedy URL would otherwise hide localhost:7778 or
+# servers/... on the same line
+_SEPARATE_PATTERNS = tuple(p for p in DEPRECATED_PATTERNS if '.*' in p)
+_SEPARATE_COMPILED = tuple((p, re.compile(p.encode(), re.IGNORECASE)) for p in _SEPARATE_PATTERNS)
+
+# The rest are short literals that cannot overlap one another, so they
+# are fused into one alternation and each file is scanned in a single
+# pass; the named group that matched identifies the pattern
+_FUSED_PATTERNS = tuple(p for p in DEPRECATED_PATTERNS if p not in _SEPARATE_PATTERNS)
+_COMBINED_PATTERN = re.compile(
+    '|'.join(f'(?P<p{i}>{p})' for i, p in enumerate(_FUSED_PATTERNS)).encode(),
+    re.IGNORECASE
+)
+_PATTERN_BY_GROUP = {f'p{i}': p for i, p in enumerate(_FUSED_PATTERNS)}
+
+# Cheap prefilter: every pattern above contains one of these literals
+# or a deprecated file name (checked against lowercased content), and
+# every file name is its own literal, so a file with no hit cannot
+# produce an issue
+_PATTERN_LITERALS = frozenset({
+    "7777", "7778", "servers/",
+    "minimal-server.js", "proxy-server.js", "live-agent-api.js",
+    "fix-vf-dev-api.yaml", "simple-infrastructure.yaml"
+})
+_PREFILTER_LITERALS = tuple(
+    literal.encode() for literal in
+    _PATTERN_LITERALS | {filename.lower() for filename in DEPRECATED_FILES}
+)
+_MAX_LITERAL_LEN = max(len(literal) for literal in _PREFILTER_LITERALS)
+_DEPRECATED_FILE_BYTES = tuple((name, name.encode()) for name in DEPRECATED_FILES)
+_NEWLINE = re.compile(b'\n')
+
+# One reported reference; match is only set for deprecated_pattern issues
+Issue = namedtuple('Issue', 'type file line content deprecated_item match', defaults=(None,))
+
+def _issue_record(issue: Issue) -> Dict[str, any]:
+    """Report dict for an issue, leaving out an unset match"""
+    record = issue._asdict()
+    if issue.match is None:
+        del record['match']
+    return record
+
 class DeprecatedDependencyChecker:
-    def __init__(self, root_dir: str):
+    # Files at least this large are memory-mapped instead of read into memory
+    MMAP_MIN_SIZE = 256 * 1024
+    # Prefilter window over mapped files, so lowercasing never copies the whole file
+    PREFILTER_WINDOW = 1024 * 1024
+    # Below this many files a process pool costs more to start than it saves
+    PARALLEL_MIN_FILES = 256
+    # Larger files (generated JSON, bundled assets) are skipped outright
+    MAX_SCAN_SIZE = 4 * 1024 * 1024
+    # Leading bytes probed for a NUL to detect binary content
+    NUL_PROBE = 8192
+    # Default cap on issues reported per file; 0 reports every issue
+    MAX_ISSUES_PER_FILE = 100
+    
+    def __init__(self, root_dir: str, max_issues_per_file: int = MAX_ISSUES_PER_FILE):
         self.root_dir = Path(root_dir)
-        self.deprecated_files = set()
-        self.deprecated_patterns = set()
+        self.max_issues_per_file = max_issues_per_file
+        # File types to scan, as a tuple for a single C-level endswith()
+        self._scan_suffixes = ('.py', '.js', '.ts', '.tsx', '.yaml', '.yml', '.json', '.md', '.env')
         self.scan_results = {
             "files_scanned": 0,
-            "deprecated_references": [],
             "clean_files": 0,
             "total_issues": 0
         }
+        # Issues are spooled to an anonymous temp file as JSON lines, so
+        # memory stays flat however many are found; see iter_issues()
+        self._issues_file = None
         
         self._load_deprecated_items()
     
     def _load_deprecated_items(self):
-        """Load list of deprecated files and patterns to search for"""
-        # Deprecated server files (moved to /deprecated/servers/)
-        deprecated_servers = [
-            "simple-server.js",
-            "debug-server.js", 
-            "minimal-test.js",
-            "simple-test.js",
-            "working-server.js",
-            "live-server.js",
-            "real-agent-server.js"
-        ]
-        
-        # Deprecated root files (moved to /deprecated/)
-        deprecated_root_files = [
-            "real-agent-server.py",
-            "real-agent-server.py",
-            "real-agent-server.py",
-            "real-agent-server.py"
-        ]
-        
-        # Deprecated infrastructure files
-        deprecated_infrastructure = [
-            "DEPRECATED - use real-agent-server.py",
-            "DEPRECATED - use real-agent-server.py",
-            "minimal-al2023-test.yaml",
-            "simple-al2023-infrastructure.yaml"
-        ]
-        
-        # Add all deprecated files to set
-        for file_list in [deprecated_servers, deprecated_root_files, deprecated_infrastructure]:
-            self.deprecated_files.update(file_list)
-        
-        # Deprecated patterns (ports, URLs, references)
-        self.deprecated_patterns.update([
-            r"localhost:7778",  # Mocked service port
-            r"port\s*[=:]\s*7777",  # Port configuration
-            r"PORT\s*[=:]\s*7777",
-            r"http://.*:7777",
-            r"servers/simple-server",
-            r"servers/debug-server", 
-            r"servers/minimal-test",
-            r"servers/working-server",
-            r"servers/live-server",
-            r"minimal-server\.js",
-            r"proxy-server\.js",
-            r"live-agent-api\.js",
-            r"fix-vf-dev-api\.yaml",
-            r"simple-infrastructure\.yaml"
-        ])
-    
-    def scan_file(self, file_path: Path) -> List[Dict[str, any]]:
+        """Point at the module-level deprecated files and compiled patterns"""
+        self.deprecated_files = DEPRECATED_FILES
+        self.deprecated_patterns = _COMPILED_PATTERNS
+        self.combined_pattern = _COMBINED_PATTERN
+        self.pattern_by_group = _PATTERN_BY_GROUP
+        self.separate_patterns = _SEPARATE_COMPILED
+        self.prefilter_literals = _PREFILTER_LITERALS
+        self._max_literal_len = _MAX_LITERAL_LEN
+        self._deprecated_file_bytes = _DEPRECATED_FILE_BYTES
+    
+    def scan_file(self, file_path: Path) -> List[Issue]:
         """Scan a single file for deprecated references"""
         issues = []
         
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                lines = content.split('\n')
+            # Unbuffered: content is taken in one or two big reads (or
+            # mapped), so a BufferedReader layer would only add copies
+            with open(file_path, 'rb', buffering=0) as f:
+                size = os.fstat(f.fileno()).st_size
+                if size > self.MAX_SCAN_SIZE:
+                    return issues
                 
-                # Check for deprecated file references
-                for filename in self.deprecated_files:
-                    if filename in content:
-                        # Find line numbers
-                        for line_num, line in enumerate(lines, 1):
-                            if filename in line:
-                                issues.append({
-                                    "type": "deprecated_file_reference",
-                                    "file": str(file_path),
-                                    "line": line_num,
-                                    "content": line.strip(),
-                                    "deprecated_item": filename
-                                })
+                # Binary files are not source; bail before any regex work
+                probe = f.read(self.NUL_PROBE)
+                if b'\x00' in probe:
+                    return issues
                 
-                # Check for deprecated patterns
-                for pattern in self.deprecated_patterns:
-                    matches = re.finditer(pattern, content, re.IGNORECASE)
-                    for match in matches:
-                        # Find line number
-                        line_num = content[:match.start()].count('\n') + 1
-                        line_content = lines[line_num - 1].strip()
-                        
-                        issues.append({
-                            "type": "deprecated_pattern",
-                            "file": str(file_path),
-                            "line": line_num,
-                            "content": line_content,
-                            "deprecated_item": pattern,
-                            "match": match.group()
-                        })
+                # Large files are mapped rather than copied into the heap;
+                # everything below works on bytes, so nothing is decoded
+                # except the lines that are actually reported
+                if size >= self.MMAP_MIN_SIZE:
+                    content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                        content.madvise(mmap.MADV_SEQUENTIAL)
+                else:
+                    content = probe + f.read()
+            
+            try:
+                self._scan_content(file_path, content, issues)
+            finally:
+                if isinstance(content, mmap.mmap):
+                    content.close()
                         
         except Exception as e:
             print(f"Warning: Could not scan {file_path}: {e}")
         
         return issues
     
+    def _scan_content(self, file_path: Path, content, issues: List[Issue]):
+        """Collect issues from file content (bytes or an mmap)"""
+        # Most files reference nothing deprecated; skip them cheaply
+        if not self._has_literal(content):
+            return
+        
+        # Offsets of every newline, so any match offset maps to its line
+        # with a binary search instead of recounting from the start
+        newlines = [m.start() for m in _NEWLINE.finditer(content)]
+        file_str = str(file_path)
+        # Once a file hits the cap it is known to be dirty; stop enumerating
+        limit = self.max_issues_per_file or float('inf')
+        
+        # Check for deprecated file references; find() jumps straight
+        # to each occurrence instead of testing every line
+        for filename, needle in self._deprecated_file_bytes:
+            pos = content.find(needle)
+            while pos != -1:
+                line_index = bisect.bisect_left(newlines, pos)
+                if len(issues) >= limit:
+                    issues.append(self._truncated(file_str, line_index + 1))
+                    return
+                issues.append(Issue(
+                    "deprecated_file_reference",
+                    file_str,
+                    line_index + 1,
+                    self._line_text(content, newlines, line_index),
+                    filename
+                ))
+                
+                # One issue per line: resume after the end of this line
+                if line_index == len(newlines):
+                    break
+                pos = content.find(needle, newlines[line_index] + 1)
+        
+        # Check for deprecated patterns: the fused pass first, then each
+        # pattern that needs a pass of its own
+        matches = chain(
+            ((match, self.pattern_by_group[match.lastgroup])
+             for match in self.combined_pattern.finditer(content)),
+            ((match, pattern)
+             for pattern, compiled in self.separate_patterns
+             for match in compiled.finditer(content))
+        )
+        for match, pattern in matches:
+            line_index = bisect.bisect_left(newlines, match.start())
+            if len(issues) >= limit:
+                issues.append(self._truncated(file_str, line_index + 1))
+                return
+            
+            issues.append(Issue(
+                "deprecated_pattern",
+                file_str,
+                line_index + 1,
+                self._line_text(content, newlines, line_index),
+                pattern,
+                match.group().decode('utf-8', errors='ignore')
+            ))
+    
+    def _truncated(self, file_str: str, line: int) -> Issue:
+        """Marker closing a file's issue list once the per-file cap is hit"""
+        return Issue(
+            "truncated",
+            file_str,
+            line,
+            f"Stopped after {self.max_issues_per_file} issues",
+            ""
+        )
+    
+    def _has_literal(self, content) -> bool:
+        """Case-insensitive check for any prefilter literal, one window at a time"""
+        overlap = self._max_literal_len - 1
+        for start in range(0, len(content), self.PREFILTER_WINDOW):
+            window = content[start:start + self.PREFILTER_WINDOW + overlap].lower()
+            if any(literal in window for literal in self.prefilter_literals):
+                return True
+        return False
+    
+    @staticmethod
+    def _line_text(content, newlines: List[int], line_index: int) -> str:
+        """Decoded, stripped text of the zero-based line line_index"""
+        start = newlines[line_index - 1] + 1 if line_index else 0
+        end = newlines[line_index] if line_index < len(newlines) else len(content)
+        return content[start:end].decode('utf-8', errors='ignore').strip()
+    
     def scan_directory(self, exclude_dirs: Set[str] = None) -> Dict[str, any]:
         """Scan entire directory tree for deprecated references"""
         if exclude_dirs is None:
@@ -132,29 +285,79 @@ class DeprecatedDependencyChecker:
                 'build'
             }
         
-        # File extensions to scan
-        scan_extensions = {'.py', '.js', '.ts', '.tsx', '.yaml', '.yml', '.json', '.md', '.env'}
+        # Phase 1: collect the files to scan
+        root = str(self.root_dir)
+        paths = []
+        self._collect_paths(root, '' if root == '.' else root + os.sep,
+                            exclude_dirs, paths)
         
-        for root, dirs, files in os.walk(self.root_dir):
-            # Skip excluded directories
-            dirs[:] = [d for d in dirs if d not in exclude_dirs]
-            
-            for file in files:
-                file_path = Path(root) / file
-                
-                # Only scan relevant file types
-                if file_path.suffix.lower() in scan_extensions:
-                    self.scan_results["files_scanned"] += 1
-                    issues = self.scan_file(file_path)
-                    
-                    if issues:
-                        self.scan_results["deprecated_references"].extend(issues)
-                        self.scan_results["total_issues"] += len(issues)
-                    else:
-                        self.scan_results["clean_files"] += 1
+        # Phase 2: scan them, across processes when the tree is big enough;
+        # regex scanning is CPU bound, so threads would serialize on the GIL
+        workers = os.cpu_count() or 1
+        if workers > 1 and len(paths) >= self.PARALLEL_MIN_FILES:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(str(self.root_dir), self.max_issues_per_file)) as executor:
+                self._collect(executor.map(_scan_file_worker, paths, chunksize=64))
+        else:
+            self._collect(map(self.scan_file, paths))
         
         return self.scan_results
     
+    def _collect_paths(self, directory: str, prefix: str, exclude_dirs: Set[str],
+                       paths: List[str]):
+        """Walk directory with scandir, appending scannable file paths as plain strings"""
+        subdirs = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    # Same rules as os.walk: symlinked dirs are listed but not entered
+                    if entry.is_dir():
+                        if entry.name not in exclude_dirs and not entry.is_symlink():
+                            subdirs.append(entry.name)
+                    elif entry.name.lower().endswith(self._scan_suffixes):
+                        # Only scan relevant file types
+                        paths.append(prefix + entry.name)
+        except OSError:
+            # os.walk skips unreadable directories too
+            return
+        
+        for name in subdirs:
+            self._collect_paths(prefix + name, prefix + name + os.sep,
+                                exclude_dirs, paths)
+    
+    def _collect(self, results):
+        """Fold per-file issue lists into the counters and the issue spool"""
+        if self._issues_file is None:
+            self._issues_file = tempfile.TemporaryFile('w+', encoding='utf-8', suffix='.ndjson')
+        spool = self._issues_file
+        spool.seek(0, os.SEEK_END)
+        
+        for issues in results:
+            self.scan_results["files_scanned"] += 1
+            
+            if issues:
+                spool.writelines(json.dumps(_issue_record(issue)) + '\n' for issue in issues)
+                found = len(issues)
+                if issues[-1].type == "truncated":
+                    found -= 1
+                self.scan_results["total_issues"] += found
+            else:
+                self.scan_results["clean_files"] += 1
+    
+    def _spooled_lines(self):
+        """Raw JSON lines from the issue spool, in scan order"""
+        if self._issues_file is None:
+            return
+        self._issues_file.flush()
+        self._issues_file.seek(0)
+        for line in self._issues_file:
+            yield line.rstrip('\n')
+    
+    def iter_issues(self):
+        """Yield each recorded Issue, in scan order"""
+        for line in self._spooled_lines():
+            yield Issue(**json.loads(line))
+    
     def print_results(self):
         """Print scan results in human-readable format"""
         results = self.scan_results
@@ -176,44 +379,69 @@ class DeprecatedDependencyChecker:
         print("[WARN] Deprecated service references found:")
         print()
         
-        # Group issues by file
-        issues_by_file = {}
-        for issue in results['deprecated_references']:
-            file_path = issue['file']
-            if file_path not in issues_by_file:
-                issues_by_file[file_path] = []
-            issues_by_file[file_path].append(issue)
-        
-        for file_path, issues in issues_by_file.items():
+        # Group issues by file; each file's issues are spooled together
+        for file_path, issues in groupby(self.iter_issues(), key=lambda issue: issue.file):
             print(f"File: {file_path}")
             for issue in issues:
-                print(f"  Line {issue['line']}: {issue['content']}")
-                print(f"    -> References: {issue['deprecated_item']}")
+                if issue.type == "truncated":
+                    print(f"  ... {issue.content} (line {issue.line})")
+                    continue
+                print(f"  Line {issue.line}: {issue.content}")
+                print(f"    -> References: {issue.deprecated_item}")
             print()
         
         return False
     
     def save_report(self, filename: str = "deprecated_dependencies_report.json"):
-        """Save scan results to JSON file"""
-        import json
+        """Save scan results to JSON file, streaming issues from the spool"""
+        results = self.scan_results
         
         with open(filename, 'w') as f:
-            json.dump(self.scan_results, f, indent=2)
+            f.write('{\n')
+            f.write(f'  "files_scanned": {results["files_scanned"]},\n')
+            f.write('  "deprecated_references": [')
+            separator = '\n    '
+            for line in self._spooled_lines():
+                f.write(separator + line)
+                separator = ',\n    '
+            f.write(']' if separator == '\n    ' else '\n  ]')
+            f.write(f',\n  "clean_files": {results["clean_files"]},\n')
+            f.write(f'  "total_issues": {results["total_issues"]}\n')
+            f.write('}')
         
         print(f"Detailed report saved to: {filename}")
 
+# Per-process checker used by scan_directory's worker pool
+_worker_checker = None
+
+def _init_worker(root_dir: str, max_issues_per_file: int):
+    global _worker_checker
+    _worker_checker = DeprecatedDependencyChecker(root_dir, max_issues_per_file)
+
+def _scan_file_worker(file_path: Path) -> List[Issue]:
+    return _worker_checker.scan_file(file_path)
+
 def main():
     """Main function"""
     import sys
     
+    args = sys.argv[1:]
+    
+    # Optional cap on issues reported per file
+    max_issues_per_file = DeprecatedDependencyChecker.MAX_ISSUES_PER_FILE
+    if "--max-issues-per-file" in args:
+        index = args.index("--max-issues-per-file")
+        max_issues_per_file = int(args[index + 1])
+        del args[index:index + 2]
+    
     # Get root directory (default to current directory)
-    root_dir = sys.argv[1] if len(sys.argv) > 1 else "."
+    root_dir = args[0] if args else "."
     
     print("Scanning for deprecated service dependencies...")
     print(f"Root directory: {os.path.abspath(root_dir)}")
     print()
     
-    checker = DeprecatedDependencyChecker(root_dir)
+    checker = DeprecatedDependencyChecker(root_dir, max_issues_per_file)
     checker.scan_directory()
     
     clean = checker.print_results()
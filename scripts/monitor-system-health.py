@@ -5,13 +5,48 @@ Automated monitoring script for the real agent discovery system
 """
 
 import json
+import functools
 import requests
+import socket
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from requests.adapters import HTTPAdapter
 from typing import Dict, List, Any
 
+try:
+    import orjson
+    _dumps = orjson.dumps
+
+    def _dumps_indented(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj, separators=(',', ':')).encode()
+
+    def _dumps_indented(obj):
+        return json.dumps(obj, indent=2).encode()
+
+def _ttl_cached(check):
+    """Reuse a check's result for CHECK_CACHE_TTL seconds after it last ran"""
+    @functools.wraps(check)
+    def wrapper(self):
+        now = time.monotonic()
+        cached = self._check_cache.get(check.__name__)
+        if cached is not None and now - cached[0] < self.CHECK_CACHE_TTL:
+            return cached[1]
+        result = check(self)
+        self._check_cache[check.__name__] = (now, result)
+        return result
+    return wrapper
+
 class RealAgentSystemMonitor:
+    # Seconds a check result is reused before the endpoint is probed again
+    CHECK_CACHE_TTL = 5
+    # Seconds to wait for a TCP connect before treating a port as closed
+    PORT_PROBE_TIMEOUT = 0.2
+    
     def __init__(self):
         self.api_base = "http://localhost:7778"
         self.health_report = {
@@ -19,11 +54,21 @@ class RealAgentSystemMonitor:
             "status": "unknown",
             "checks": {}
         }
+        # Shared keep-alive pool so repeated checks reuse their connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # Check method name -> (monotonic time it ran, result)
+        self._check_cache: Dict[str, tuple] = {}
+        # One worker per check, kept for the monitor's lifetime
+        self._executor = ThreadPoolExecutor(max_workers=4)
     
+    @_ttl_cached
     def check_discovery_server(self) -> Dict[str, Any]:
         """Check if real agent discovery server is responding"""
         try:
-            response = requests.get(f"{self.api_base}/health", timeout=5)
+            response = self.session.get(f"{self.api_base}/health", timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 return {
@@ -48,10 +93,11 @@ class RealAgentSystemMonitor:
                 "details": {}
             }
     
+    @_ttl_cached
     def check_daemon_agents(self) -> Dict[str, Any]:
         """Check status of running daemon agents"""
         try:
-            response = requests.get(f"{self.api_base}/api/agents", timeout=10)
+            response = self.session.get(f"{self.api_base}/api/agents", timeout=10)
             if response.status_code == 200:
                 agents = response.json()
                 daemon_agents = [a for a in agents if 'daemon' in a['name'].lower()]
@@ -79,10 +125,11 @@ class RealAgentSystemMonitor:
                 "details": {}
             }
     
+    @_ttl_cached
     def check_dashboard_api(self) -> Dict[str, Any]:
         """Check dashboard API endpoints"""
         try:
-            response = requests.get(f"{self.api_base}/api/dashboard/agents", timeout=10)
+            response = self.session.get(f"{self.api_base}/api/dashboard/agents", timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 if data.get("success"):
@@ -114,14 +161,23 @@ class RealAgentSystemMonitor:
                 "details": {}
             }
     
+    @_ttl_cached
     def check_deprecated_services(self) -> Dict[str, Any]:
         """Check that deprecated services are not being accessed"""
         deprecated_ports = [7777]  # Mocked service port
         issues = []
         
         for port in deprecated_ports:
+            # Cheap TCP probe first: a refused connection is the expected,
+            # healthy case and needs no HTTP request at all. create_connection
+            # tries every address localhost resolves to, IPv6 included.
+            try:
+                socket.create_connection(("localhost", port), timeout=self.PORT_PROBE_TIMEOUT).close()
+            except OSError:
+                continue
+            
             try:
-                response = requests.get(f"http://localhost:{port}/health", timeout=2)
+                response = self.session.get(f"http://localhost:{port}/health", timeout=2)
                 if response.status_code == 200:
                     issues.append(f"Deprecated service on port {port} is still running")
             except requests.exceptions.RequestException:
@@ -144,13 +200,20 @@ class RealAgentSystemMonitor:
         """Run all health checks and return comprehensive report"""
         self.health_report["timestamp"] = datetime.now().isoformat()
         
-        # Run all checks
-        checks = {
-            "discovery_server": self.check_discovery_server(),
-            "daemon_agents": self.check_daemon_agents(),
-            "dashboard_api": self.check_dashboard_api(),
-            "deprecated_services": self.check_deprecated_services()
+        # Run all checks concurrently; each one is blocking HTTP I/O
+        check_funcs = {
+            "discovery_server": self.check_discovery_server,
+            "daemon_agents": self.check_daemon_agents,
+            "dashboard_api": self.check_dashboard_api,
+            "deprecated_services": self.check_deprecated_services
         }
+        results = {}
+        futures = {self._executor.submit(func): name for name, func in check_funcs.items()}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+        
+        # Keep the report in the fixed check order
+        checks = {name: results[name] for name in check_funcs}
         
         self.health_report["checks"] = checks
         
@@ -194,14 +257,14 @@ class RealAgentSystemMonitor:
         
         print("=" * 60)
     
-    def save_report(self, report: Dict[str, Any], filename: str = None):
-        """Save health report to JSON file"""
+    def save_report(self, report: Dict[str, Any], filename: str = None, pretty: bool = False):
+        """Save health report to JSON file (compact unless pretty is set)"""
         if filename is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"health_report_{timestamp}.json"
         
-        with open(filename, 'w') as f:
-            json.dump(report, f, indent=2)
+        with open(filename, 'wb') as f:
+            f.write(_dumps_indented(report) if pretty else _dumps(report))
         
         print(f"Report saved to: {filename}")
 
@@ -211,10 +274,13 @@ def main():
     
     # Check if this is continuous monitoring mode
     continuous = "--continuous" in sys.argv
+    # Indent saved reports for reading by hand
+    pretty = "--pretty" in sys.argv
     interval = 60  # 60 seconds between checks
     
     if continuous:
         print("Starting continuous monitoring (Ctrl+C to stop)...")
+        next_run = time.monotonic()
         try:
             while True:
                 report = monitor.run_health_checks()
@@ -222,9 +288,12 @@ def main():
                 
                 if report['status'] != 'healthy':
                     # Save report when issues are detected
-                    monitor.save_report(report)
+                    monitor.save_report(report, pretty=pretty)
                 
-                time.sleep(interval)
+                # Keep a fixed cadence: time spent checking comes out of the
+                # wait, and an overrunning tick starts the next one at once
+                next_run = max(next_run + interval, time.monotonic())
+                time.sleep(max(0, next_run - time.monotonic()))
         except KeyboardInterrupt:
             print("\nMonitoring stopped by user")
     else:
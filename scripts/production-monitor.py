@@ -10,13 +10,26 @@ import time
 import threading
 import psutil
 import os
+import socket
+import string
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
 from typing import Dict, List, Any
 from pathlib import Path
 import http.server
-import socketserver
 from urllib.parse import urlparse, parse_qs
 
+try:
+    import orjson
+
+    def _dumps_indented(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    def _dumps_indented(obj):
+        return json.dumps(obj, indent=2).encode()
+
 # Import alert manager if available
 try:
     from alert_manager import AlertManager, Alert, AlertLevel
@@ -26,6 +39,13 @@ except ImportError:
     print("Alert manager not available - running without alerts")
 
 class ProductionMonitor:
+    # Seconds a cycle waits for its checks before marking stragglers failed
+    CHECK_TIMEOUT = 15
+    # Disk usage barely moves, so it is re-read only every this many checks
+    DISK_REFRESH_CHECKS = 10
+    # Seconds to wait for a TCP connect before treating a port as closed
+    PORT_PROBE_TIMEOUT = 0.2
+    
     def __init__(self):
         self.api_base = "http://localhost:7778"
         self.monitoring_data = {
@@ -44,6 +64,41 @@ class ProductionMonitor:
             "min_success_rate": 85
         }
         self.running = False
+        # Set by stop_monitoring to wake the monitoring loop from its wait
+        self._stop_event = threading.Event()
+        
+        # Agent name -> whether it names a daemon; agents are long-lived,
+        # so each name is lowercased and tested only the first time it is seen
+        self._daemon_names: Dict[str, bool] = {}
+        
+        # Most recent alerts across cycles, oldest dropped first
+        self._alerts_ring = deque(maxlen=10)
+        
+        # /api/data body, serialized once per cycle rather than per request
+        self._json_lock = threading.Lock()
+        self._cached_json = _dumps_indented(self.monitoring_data)
+        
+        # Shared keep-alive pool so probes reuse connections across cycles
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # One worker per check; each blocks on HTTP or psutil's sampling
+        # interval, so running them side by side bounds a cycle by the slowest
+        self._pool = ThreadPoolExecutor(max_workers=4)
+        
+        # Prime psutil's CPU counters: later non-blocking cpu_percent() calls
+        # report usage since the previous call instead of sleeping a second
+        psutil.cpu_percent(interval=None)
+        self._disk = None
+        self._resource_checks = 0
+        
+        # Boot time never changes while we run; read it once
+        try:
+            self._boot_time = psutil.boot_time()
+        except Exception:
+            self._boot_time = None
         
         # Initialize alert manager if available
         self.alert_manager = None
@@ -57,13 +112,22 @@ class ProductionMonitor:
         
     def check_system_health(self) -> Dict[str, Any]:
         """Comprehensive system health check"""
-        health_data = {
-            "timestamp": datetime.now().isoformat(),
-            "discovery_server": self._check_discovery_server(),
-            "daemon_agents": self._check_daemon_agents(),
-            "system_resources": self._check_system_resources(),
-            "deprecated_services": self._check_deprecated_services()
+        health_data = {"timestamp": datetime.now().isoformat()}
+        checks = {
+            "discovery_server": self._pool.submit(self._check_discovery_server),
+            "daemon_agents": self._pool.submit(self._check_daemon_agents),
+            "system_resources": self._pool.submit(self._check_system_resources),
+            "deprecated_services": self._pool.submit(self._check_deprecated_services)
         }
+        wait(checks.values(), timeout=self.CHECK_TIMEOUT)
+        for check_name, future in checks.items():
+            if future.done():
+                health_data[check_name] = future.result()
+            else:
+                health_data[check_name] = {
+                    "status": "failed",
+                    "error": f"Check timed out after {self.CHECK_TIMEOUT}s"
+                }
         
         # Determine overall health
         critical_checks = ["discovery_server", "daemon_agents"]
@@ -97,7 +161,7 @@ class ProductionMonitor:
         """Check real agent discovery server"""
         try:
             start_time = time.time()
-            response = requests.get(f"{self.api_base}/health", timeout=5)
+            response = self.session.get(f"{self.api_base}/health", timeout=5)
             response_time = (time.time() - start_time) * 1000
             
             if response.status_code == 200:
@@ -132,23 +196,47 @@ class ProductionMonitor:
     def _check_daemon_agents(self) -> Dict[str, Any]:
         """Check daemon agent status and performance"""
         try:
-            response = requests.get(f"{self.api_base}/api/agents", timeout=10)
+            response = self.session.get(f"{self.api_base}/api/agents", timeout=10)
             if response.status_code == 200:
                 agents = response.json()
-                daemon_agents = [a for a in agents if 'daemon' in a['name'].lower()]
-                active_daemons = [a for a in daemon_agents if a['status'] == 'active']
+                
+                # One pass over the agents gathers every daemon metric
+                daemon_details = []
+                active_count = 0
+                cpu_total = memory_total = total_tasks = 0
+                daemon_names = self._daemon_names
+                for a in agents:
+                    name = a['name']
+                    is_daemon = daemon_names.get(name)
+                    if is_daemon is None:
+                        is_daemon = daemon_names[name] = 'daemon' in name.lower()
+                    if not is_daemon:
+                        continue
+                    if a['status'] == 'active':
+                        active_count += 1
+                    cpu_total += a['cpuUsage']
+                    memory_total += a['memoryUsage']
+                    total_tasks += a['taskCount']
+                    daemon_details.append({
+                        "name": name,
+                        "type": a['type'],
+                        "status": a['status'],
+                        "cpu": a['cpuUsage'],
+                        "memory": a['memoryUsage'],
+                        "tasks": a['taskCount']
+                    })
                 
                 # Calculate metrics
-                if daemon_agents:
-                    avg_cpu = sum(a['cpuUsage'] for a in daemon_agents) / len(daemon_agents)
-                    avg_memory = sum(a['memoryUsage'] for a in daemon_agents) / len(daemon_agents)
-                    total_tasks = sum(a['taskCount'] for a in daemon_agents)
+                daemon_count = len(daemon_details)
+                if daemon_count:
+                    avg_cpu = cpu_total / daemon_count
+                    avg_memory = memory_total / daemon_count
                 else:
-                    avg_cpu = avg_memory = total_tasks = 0
+                    avg_cpu = avg_memory = 0
                 
                 # Determine status
                 status = "healthy"
-                if len(active_daemons) < self.alert_thresholds["min_active_agents"]:
+                if active_count < self.alert_thresholds["min_active_agents"]:
                     status = "warning"
                 if avg_cpu > self.alert_thresholds["max_cpu_usage"]:
                     status = "warning"
@@ -157,22 +245,12 @@ class ProductionMonitor:
                 
                 return {
                     "status": status,
-                    "total_daemon_agents": len(daemon_agents),
-                    "active_daemon_agents": len(active_daemons),
+                    "total_daemon_agents": daemon_count,
+                    "active_daemon_agents": active_count,
                     "average_cpu_usage": round(avg_cpu, 1),
                     "average_memory_usage": round(avg_memory, 1),
                     "total_tasks_completed": total_tasks,
-                    "daemon_details": [
-                        {
-                            "name": a['name'],
-                            "type": a['type'],
-                            "status": a['status'],
-                            "cpu": a['cpuUsage'],
-                            "memory": a['memoryUsage'],
-                            "tasks": a['taskCount']
-                        }
-                        for a in daemon_agents
-                    ]
+                    "daemon_details": daemon_details
                 }
             else:
                 return {
@@ -189,9 +267,12 @@ class ProductionMonitor:
     def _check_system_resources(self) -> Dict[str, Any]:
         """Check system resources (CPU, Memory, Disk)"""
         try:
-            cpu_percent = psutil.cpu_percent(interval=1)
+            cpu_percent = psutil.cpu_percent(interval=None)
             memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
+            if self._disk is None or self._resource_checks % self.DISK_REFRESH_CHECKS == 0:
+                self._disk = psutil.disk_usage('/')
+            self._resource_checks += 1
+            disk = self._disk
             
             status = "healthy"
             if cpu_percent > 80 or memory.percent > 85 or disk.percent > 90:
@@ -220,8 +301,16 @@ class ProductionMonitor:
         running_deprecated = []
         
         for port in deprecated_ports:
+            # Cheap TCP probe first: a refused connection is the expected,
+            # healthy case and needs no HTTP request at all. create_connection
+            # tries every address localhost resolves to, IPv6 included.
+            try:
+                socket.create_connection(("localhost", port), timeout=self.PORT_PROBE_TIMEOUT).close()
+            except OSError:
+                continue
+            
             try:
-                response = requests.get(f"http://localhost:{port}/health", timeout=2)
+                response = self.session.get(f"http://localhost:{port}/health", timeout=2)
                 if response.status_code == 200:
                     running_deprecated.append(f"Port {port} (deprecated)")
             except requests.exceptions.RequestException:
@@ -330,12 +419,14 @@ class ProductionMonitor:
             except Exception as e:
                 print(f"Alert manager error: {e}")
         
+        self._alerts_ring.extend(alerts)
+        
         # Update monitoring data
         self.monitoring_data.update({
             "system_status": health_data["overall_health"]["status"],
             "last_update": datetime.now().isoformat(),
             "metrics": health_data,
-            "alerts": alerts[-10:],  # Keep last 10 alerts
+            "alerts": list(self._alerts_ring),  # Keep last 10 alerts
             "alert_summary": alert_summary,
             "performance": {
                 "uptime_hours": self._get_uptime_hours(),
@@ -345,33 +436,43 @@ class ProductionMonitor:
         
         self._cycles_completed = getattr(self, '_cycles_completed', 0) + 1
         
+        payload = _dumps_indented(self.monitoring_data)
+        with self._json_lock:
+            self._cached_json = payload
+        
         return self.monitoring_data
     
     def _get_uptime_hours(self) -> float:
         """Get system uptime in hours"""
-        try:
-            boot_time = psutil.boot_time()
-            uptime_seconds = time.time() - boot_time
-            return round(uptime_seconds / 3600, 2)
-        except:
+        if self._boot_time is None:
             return 0.0
+        uptime_seconds = time.time() - self._boot_time
+        return round(uptime_seconds / 3600, 2)
     
     def start_monitoring(self, interval: int = 30):
         """Start continuous monitoring"""
         self.running = True
+        self._stop_event.clear()
         print(f"Starting production monitoring (interval: {interval}s)...")
         
         def monitoring_loop():
+            backoff = 1
             while self.running:
                 try:
                     self.run_monitoring_cycle()
-                    time.sleep(interval)
+                    delay = interval
+                    backoff = 1
                 except KeyboardInterrupt:
                     self.running = False
                     break
                 except Exception as e:
                     print(f"Monitoring error: {e}")
-                    time.sleep(interval)
+                    # Retry soon after a failure, doubling the wait up to interval
+                    delay = min(backoff, interval)
+                    backoff *= 2
+                
+                if self._stop_event.wait(delay):
+                    break
         
         # Start monitoring in background thread
         monitor_thread = threading.Thread(target=monitoring_loop, daemon=True)
@@ -382,12 +483,18 @@ class ProductionMonitor:
     def stop_monitoring(self):
         """Stop monitoring"""
         self.running = False
+        self._stop_event.set()
         print("Monitoring stopped")
     
     def get_monitoring_data(self) -> Dict[str, Any]:
         """Get current monitoring data"""
         return self.monitoring_data
     
+    def get_monitoring_json(self) -> bytes:
+        """Get current monitoring data as the JSON served at /api/data"""
+        with self._json_lock:
+            return self._cached_json
+    
     def print_dashboard(self):
         """Print console dashboard"""
         data = self.monitoring_data
@@ -434,101 +541,131 @@ class ProductionMonitor:
         
         print("=" * 80)
 
-class ProductionWebServer:
-    """Simple web server for monitoring dashboard"""
-    
-    def __init__(self, monitor: ProductionMonitor, port: int = 8080):
-        self.monitor = monitor
-        self.port = port
-        
-    def create_html_dashboard(self) -> str:
-        """Create HTML dashboard"""
-        data = self.monitor.get_monitoring_data()
-        
-        html = f"""
+# Static dashboard page, parsed once; create_html_dashboard only fills in
+# the fields that change between requests
+_DASHBOARD_TEMPLATE = string.Template("""
         <!DOCTYPE html>
         <html>
         <head>
             <title>Production Agent Monitor</title>
             <meta http-equiv="refresh" content="30">
             <style>
-                body {{ font-family: Arial, sans-serif; margin: 20px; background: #f5f5f5; }}
-                .container {{ max-width: 1200px; margin: 0 auto; }}
-                .header {{ text-align: center; background: #2c3e50; color: white; padding: 20px; border-radius: 5px; }}
-                .status-healthy {{ color: #27ae60; }}
-                .status-warning {{ color: #f39c12; }}
-                .status-critical {{ color: #e74c3c; }}
-                .card {{ background: white; margin: 15px 0; padding: 15px; border-radius: 5px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
-                .metrics {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: 15px; }}
-                .metric {{ text-align: center; }}
-                .metric-value {{ font-size: 24px; font-weight: bold; }}
-                .alert {{ padding: 10px; margin: 5px 0; border-left: 4px solid #e74c3c; background: #fdf2f2; }}
-                .alert.warning {{ border-color: #f39c12; background: #fef9e7; }}
+                body { font-family: Arial, sans-serif; margin: 20px; background: #f5f5f5; }
+                .container { max-width: 1200px; margin: 0 auto; }
+                .header { text-align: center; background: #2c3e50; color: white; padding: 20px; border-radius: 5px; }
+                .status-healthy { color: #27ae60; }
+                .status-warning { color: #f39c12; }
+                .status-critical { color: #e74c3c; }
+                .card { background: white; margin: 15px 0; padding: 15px; border-radius: 5px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
+                .metrics { display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: 15px; }
+                .metric { text-align: center; }
+                .metric-value { font-size: 24px; font-weight: bold; }
+                .alert { padding: 10px; margin: 5px 0; border-left: 4px solid #e74c3c; background: #fdf2f2; }
+                .alert.warning { border-color: #f39c12; background: #fef9e7; }
             </style>
         </head>
         <body>
             <div class="container">
                 <div class="header">
                     <h1>🎯 Production Agent System Monitor</h1>
-                    <p class="status-{data['system_status']}">Status: {data['system_status'].upper()}</p>
-                    <p>Last Update: {data['last_update']}</p>
+                    <p class="status-${system_status}">Status: ${status_label}</p>
+                    <p>Last Update: ${last_update}</p>
                 </div>
                 
                 <div class="metrics">
                     <div class="card metric">
                         <h3>Discovery Server</h3>
-                        <div class="metric-value status-{data['metrics'].get('discovery_server', {}).get('status', 'unknown')}">
-                            {data['metrics'].get('discovery_server', {}).get('status', 'Unknown').upper()}
+                        <div class="metric-value status-${discovery_status}">
+                            ${discovery_status_label}
                         </div>
-                        <p>Response: {data['metrics'].get('discovery_server', {}).get('response_time_ms', 0):.1f}ms</p>
-                        <p>Agents: {data['metrics'].get('discovery_server', {}).get('agents_discovered', 0)}</p>
+                        <p>Response: ${discovery_response_ms}ms</p>
+                        <p>Agents: ${agents_discovered}</p>
                     </div>
                     
                     <div class="card metric">
                         <h3>Daemon Agents</h3>
-                        <div class="metric-value status-{data['metrics'].get('daemon_agents', {}).get('status', 'unknown')}">
-                            {data['metrics'].get('daemon_agents', {}).get('active_daemon_agents', 0)}/{data['metrics'].get('daemon_agents', {}).get('total_daemon_agents', 0)}
+                        <div class="metric-value status-${daemon_status}">
+                            ${active_daemons}/${total_daemons}
                         </div>
                         <p>Active Agents</p>
-                        <p>Tasks: {data['metrics'].get('daemon_agents', {}).get('total_tasks_completed', 0)}</p>
+                        <p>Tasks: ${total_tasks}</p>
                     </div>
                     
                     <div class="card metric">
                         <h3>System Resources</h3>
                         <div class="metric-value">
-                            CPU: {data['metrics'].get('system_resources', {}).get('cpu_percent', 0):.1f}%
+                            CPU: ${cpu_percent}%
                         </div>
-                        <p>Memory: {data['metrics'].get('system_resources', {}).get('memory_percent', 0):.1f}%</p>
-                        <p>Disk: {data['metrics'].get('system_resources', {}).get('disk_percent', 0):.1f}%</p>
+                        <p>Memory: ${memory_percent}%</p>
+                        <p>Disk: ${disk_percent}%</p>
                     </div>
                     
                     <div class="card metric">
                         <h3>Performance</h3>
                         <div class="metric-value">
-                            {data['performance'].get('uptime_hours', 0):.1f}h
+                            ${uptime_hours}h
                         </div>
                         <p>System Uptime</p>
-                        <p>Cycles: {data['performance'].get('monitoring_cycles_completed', 0)}</p>
+                        <p>Cycles: ${cycles}</p>
                     </div>
                 </div>
                 
                 <div class="card">
                     <h3>⚠️ Active Alerts</h3>
-                    {''.join([f'<div class="alert {alert["level"]}"><strong>{alert["title"]}</strong>: {alert["message"]}</div>' for alert in data.get('alerts', [])]) or '<p>No active alerts</p>'}
+                    ${alerts_html}
                 </div>
                 
                 <div class="card">
                     <h3>🤖 Daemon Agent Details</h3>
                     <table border="1" style="width:100%; border-collapse: collapse;">
                         <tr><th>Name</th><th>Type</th><th>Status</th><th>CPU</th><th>Memory</th><th>Tasks</th></tr>
-                        {''.join([f'<tr><td>{agent["name"]}</td><td>{agent["type"]}</td><td>{agent["status"]}</td><td>{agent["cpu"]}%</td><td>{agent["memory"]}%</td><td>{agent["tasks"]}</td></tr>' for agent in data['metrics'].get('daemon_agents', {}).get('daemon_details', [])])}
+                        ${daemon_rows}
                     </table>
                 </div>
             </div>
         </body>
         </html>
-        """
-        return html
+        """)
+_ALERT_HTML = '<div class="alert {level}"><strong>{title}</strong>: {message}</div>'
+_DAEMON_ROW_HTML = '<tr><td>{name}</td><td>{type}</td><td>{status}</td><td>{cpu}%</td><td>{memory}%</td><td>{tasks}</td></tr>'
+
+class ProductionWebServer:
+    """Simple web server for monitoring dashboard"""
+    
+    def __init__(self, monitor: ProductionMonitor, port: int = 8080):
+        self.monitor = monitor
+        self.port = port
+        
+    def create_html_dashboard(self) -> str:
+        """Create HTML dashboard"""
+        data = self.monitor.get_monitoring_data()
+        metrics = data['metrics']
+        discovery = metrics.get('discovery_server', {})
+        daemons = metrics.get('daemon_agents', {})
+        resources = metrics.get('system_resources', {})
+        performance = data['performance']
+        
+        alerts_html = ''.join(_ALERT_HTML.format_map(alert) for alert in data.get('alerts', []))
+        return _DASHBOARD_TEMPLATE.substitute(
+            system_status=data['system_status'],
+            status_label=data['system_status'].upper(),
+            last_update=data['last_update'],
+            discovery_status=discovery.get('status', 'unknown'),
+            discovery_status_label=discovery.get('status', 'Unknown').upper(),
+            discovery_response_ms=f"{discovery.get('response_time_ms', 0):.1f}",
+            agents_discovered=discovery.get('agents_discovered', 0),
+            daemon_status=daemons.get('status', 'unknown'),
+            active_daemons=daemons.get('active_daemon_agents', 0),
+            total_daemons=daemons.get('total_daemon_agents', 0),
+            total_tasks=daemons.get('total_tasks_completed', 0),
+            cpu_percent=f"{resources.get('cpu_percent', 0):.1f}",
+            memory_percent=f"{resources.get('memory_percent', 0):.1f}",
+            disk_percent=f"{resources.get('disk_percent', 0):.1f}",
+            uptime_hours=f"{performance.get('uptime_hours', 0):.1f}",
+            cycles=performance.get('monitoring_cycles_completed', 0),
+            alerts_html=alerts_html or '<p>No active alerts</p>',
+            daemon_rows=''.join(_DAEMON_ROW_HTML.format_map(agent) for agent in daemons.get('daemon_details', []))
+        )
     
     def serve_dashboard(self):
         """Serve the dashboard via HTTP"""
@@ -541,11 +678,12 @@ class ProductionWebServer:
                     html = self.server.web_server.create_html_dashboard()
                     self.wfile.write(html.encode())
                 elif self.path == '/api/data':
+                    payload = self.server.web_server.monitor.get_monitoring_json()
                     self.send_response(200)
                     self.send_header('Content-type', 'application/json')
+                    self.send_header('Content-Length', str(len(payload)))
                     self.end_headers()
-                    data = json.dumps(self.server.web_server.monitor.get_monitoring_data(), indent=2)
-                    self.wfile.write(data.encode())
+                    self.wfile.write(payload)
                 else:
                     self.send_response(404)
                     self.end_headers()
@@ -554,7 +692,8 @@ class ProductionWebServer:
                 # Suppress logging
                 pass
         
-        with socketserver.TCPServer(("", self.port), DashboardHandler) as httpd:
+        # A thread per request, so a slow page render never holds up JSON pollers
+        with http.server.ThreadingHTTPServer(("", self.port), DashboardHandler) as httpd:
             httpd.web_server = self
             print(f"Production monitoring dashboard available at: http://localhost:{self.port}")
             httpd.serve_forever()
@@ -1,32 +1,131 @@
 #!/usr/bin/env python3
+import gzip
+import hashlib
 import json
+import os
 import random
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import signal
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+
+AGENTS_TTL = 5.0
+
+# (body, etag, gzipped body) so readers never see a body with a stale tag
+_cache = {'entry': (b'[]', None, None), 'expires': 0.0}
+_cache_lock = threading.Lock()
+
+def build_agents():
+    agents = []
+    for i in range(1, 51):
+        agents.append({
+            'id': f'agent-{i}',
+            'name': f'Agent {i}',
+            'status': random.choice(['active', 'idle', 'busy']),
+            'cpuUsage': random.randint(0, 100),
+            'memoryUsage': random.randint(0, 100),
+            'taskCount': random.randint(0, 20)
+        })
+    return agents
+
+def _etag(body):
+    return '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    return any(tag.strip() in (etag, '*') for tag in if_none_match.split(','))
+
+def _accepts_gzip(accept_encoding):
+    return 'gzip' in (accept_encoding or '')
+
+def _cached_agents_body(ttl=AGENTS_TTL):
+    """Serialized agent list, its ETag and a gzipped copy, rebuilt at most once per ttl seconds"""
+    if time.monotonic() < _cache['expires']:
+        return _cache['entry']
+    with _cache_lock:
+        now = time.monotonic()
+        if now >= _cache['expires']:
+            body = _dumps(build_agents())
+            _cache['entry'] = (body, _etag(body), gzip.compress(body, compresslevel=1))
+            _cache['expires'] = now + ttl
+        return _cache['entry']
+
+_ROOT_BODY = _dumps({'message': 'Niro Agent API', 'status': 'running'})
+
+_JSON_HEADERS = (('Content-Type', 'application/json'), ('Access-Control-Allow-Origin', '*'))
+
 class APIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _send(self, status, body, headers):
+        """Write status line, headers and body with a single write on the keep-alive socket"""
+        self.log_request(status)
+        lines = ['%s %d %s' % (self.protocol_version, status, self.responses[status][0])]
+        lines += ['%s: %s' % header for header in headers]
+        if status != 304:
+            lines.append('Content-Length: %d' % len(body))
+        self.wfile.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+
     def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
         if self.path == '/api/agents':
-            agents = []
-            for i in range(1, 51):
-                agents.append({
-                    'id': f'agent-{i}',
-                    'name': f'Agent {i}',
-                    'status': random.choice(['active', 'idle', 'busy']),
-                    'cpuUsage': random.randint(0, 100),
-                    'memoryUsage': random.randint(0, 100),
-                    'taskCount': random.randint(0, 20)
-                })
-            self.wfile.write(json.dumps(agents).encode())
+            body, etag, gzipped = _cached_agents_body()
+            cache_headers = (('Cache-Control', 'max-age=5'), ('Vary', 'Accept-Encoding'))
+            if _accepts_gzip(self.headers.get('Accept-Encoding')):
+                body, etag = gzipped, etag[:-1] + '-gzip"'
+                cache_headers += (('Content-Encoding', 'gzip'),)
+            cache_headers += (('ETag', etag),)
+            if _etag_matches(self.headers.get('If-None-Match'), etag):
+                self._send(304, b'', cache_headers + (('Access-Control-Allow-Origin', '*'),))
+            else:
+                self._send(200, body, _JSON_HEADERS + cache_headers)
         else:
-            self.wfile.write(json.dumps({'message': 'Niro Agent API', 'status': 'running'}).encode())
+            self._send(200, _ROOT_BODY, _JSON_HEADERS)
+
+def serve(server, workers):
+    """Serve forever; with workers > 1 (Unix only), fork that many children
+    onto the already-bound socket and wait for them, forwarding signals"""
+    if workers <= 1 or not hasattr(os, 'fork'):
+        server.serve_forever()
+        return
+    children = set()
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        children.add(pid)
+
+    def forward(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+    server.server_close()
 
 if __name__ == '__main__':
-    server = HTTPServer(('0.0.0.0', 7777), APIHandler)
+    # Bind once in this process so a second instance still fails with
+    # EADDRINUSE; forked workers (API_WORKERS > 1) share the socket
+    server = ThreadingHTTPServer(('0.0.0.0', 7777), APIHandler)
     print('API server running on port 7777')
-    server.serve_forever()
+    serve(server, int(os.environ.get('API_WORKERS', 1)))
@@ -1,124 +1,270 @@
 #!/usr/bin/env python3
+import gzip
+import hashlib
 import json
 import os
-import glob
+import itertools
+import signal
+import threading
+import time
 from datetime import datetime, timedelta
 import random
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse
 
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+
+# Dependency and build trees never hold agent scripts; skip them to save getdents/stat calls
+_SKIP_DIRS = frozenset({'node_modules', '__pycache__', 'venv', 'dist', 'build'})
+
+def _iter_agent_files(root, name_prefix='', name_suffix='.py'):
+    """Yield DirEntry objects for matching files below root (hidden entries skipped, like glob)"""
+    min_len = len(name_prefix) + len(name_suffix)
+    try:
+        entries = os.scandir(root)
+    except OSError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name in _SKIP_DIRS:
+                    continue
+                yield from _iter_agent_files(entry.path, name_prefix, name_suffix)
+            elif (len(entry.name) >= min_len and entry.name.startswith(name_prefix)
+                    and entry.name.endswith(name_suffix)):
+                yield entry
+
+def discover_real_agents():
+    agents = []
+    now = datetime.now()
+    
+    # Business service agents
+    business_path = '/home/ssurles/Projects/NiroAgent/na-business-service'
+    if os.path.exists(business_path):
+        for i, entry in enumerate(_iter_agent_files(business_path, 'ai-', '-agent-real.py')):
+            file = entry.path
+            agent_type = 'qa' if 'qa' in file else 'developer' if 'developer' in file else 'unknown'
+            stat = entry.stat()
+            agents.append({
+                'id': f'business-{agent_type}-{i+1}',
+                'name': f'AI {agent_type.upper()} Agent',
+                'type': f'business-{agent_type}',
+                'status': 'active',
+                'lastSeen': datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                'cpu': random.randint(15, 60),
+                'memory': random.randint(20, 80),
+                'tasks': {
+                    'completed': random.randint(10, 50),
+                    'active': random.randint(0, 8),
+                    'failed': random.randint(0, 3)
+                },
+                'source': 'business-service',
+                'location': file.replace('/home/ssurles/Projects/', ''),
+                'riskLevel': 'low' if random.random() > 0.2 else 'medium'
+            })
+    
+    # Autonomous system agents
+    auto_path = '/home/ssurles/Projects/NiroAgent/na-autonomous-system'
+    if os.path.exists(auto_path):
+        agent_files = itertools.islice(_iter_agent_files(auto_path), 5)
+        for i, entry in enumerate(agent_files):
+            file = entry.path
+            agents.append({
+                'id': f'autonomous-{i+1}',
+                'name': f'Autonomous Agent {i+1}',
+                'type': 'autonomous',
+                'status': random.choice(['active', 'idle', 'busy']),
+                'lastSeen': (now - timedelta(minutes=random.randint(1, 60))).isoformat(),
+                'cpu': random.randint(10, 80),
+                'memory': random.randint(15, 70),
+                'tasks': {
+                    'completed': random.randint(5, 30),
+                    'active': random.randint(0, 5),
+                    'failed': random.randint(0, 2)
+                },
+                'source': 'autonomous-system',
+                'location': file.replace('/home/ssurles/Projects/', ''),
+                'riskLevel': 'low' if random.random() > 0.3 else 'medium'
+            })
+    
+    # Dashboard service agents (from current repo)
+    dashboard_path = '/home/ssurles/Projects/NiroAgent/na-agent-dashboard'
+    if os.path.exists(dashboard_path):
+        agents.append({
+            'id': 'dashboard-api-1',
+            'name': 'Dashboard API Server',
+            'type': 'dashboard-service',
+            'status': 'active',
+            'lastSeen': now.isoformat(),
+            'cpu': random.randint(20, 50),
+            'memory': random.randint(30, 60),
+            'tasks': {
+                'completed': random.randint(100, 500),
+                'active': random.randint(5, 20),
+                'failed': random.randint(0, 5)
+            },
+            'source': 'dashboard-service',
+            'location': 'NiroAgent/na-agent-dashboard',
+            'riskLevel': 'low'
+        })
+    
+    return agents
+
+AGENTS_TTL = 5.0
+
+def _agent_columns(agents):
+    """Column view of the fields /api/dashboard/stats aggregates"""
+    return {
+        'status': [a['status'] for a in agents],
+        'type': [a['type'] for a in agents],
+        'cpu': [a['cpu'] for a in agents],
+        'memory': [a['memory'] for a in agents],
+        'tasks': [a['tasks']['completed'] + a['tasks']['active'] for a in agents]
+    }
+
+def _etag(body):
+    return '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    return any(tag.strip() in (etag, '*') for tag in if_none_match.split(','))
+
+def _accepts_gzip(accept_encoding):
+    return 'gzip' in (accept_encoding or '')
+
+def _build_snapshot(agents):
+    # Only the serialized body and the stat columns are kept; the agent dicts can be freed
+    body = _dumps(agents)
+    return {
+        'body': body,
+        'etag': _etag(body),
+        'gzipped': gzip.compress(body, compresslevel=1),
+        'columns': _agent_columns(agents)
+    }
+
+# Replaced wholesale by the refresher thread, so readers always see a consistent set
+_snapshot = _build_snapshot([])
+
+def _refresh_agents():
+    global _snapshot
+    _snapshot = _build_snapshot(discover_real_agents())
+
+def _refresh_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            _refresh_agents()
+        except Exception as e:
+            print(f'Agent refresh failed: {e}')
+
+def start_refresher(interval=AGENTS_TTL):
+    """Scan once, then keep the snapshot fresh from a background thread"""
+    _refresh_agents()
+    threading.Thread(target=_refresh_loop, args=(interval,), daemon=True).start()
+
+# Static responses; /health only splices its timestamp between fixed bytes
+_ROOT_BODY = _dumps({'message': 'Real Agent API', 'status': 'running'})
+_HEALTH_PREFIX = b'{"status":"ok","timestamp":"'
+_HEALTH_SUFFIX = b'","server":"real-agent-server","port":7778}'
+
+_JSON_HEADERS = (('Content-Type', 'application/json'), ('Access-Control-Allow-Origin', '*'))
+
 class RealAgentHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _send(self, status, body, headers):
+        """Write status line, headers and body with a single write on the keep-alive socket"""
+        self.log_request(status)
+        lines = ['%s %d %s' % (self.protocol_version, status, self.responses[status][0])]
+        lines += ['%s: %s' % header for header in headers]
+        if status != 304:
+            lines.append('Content-Length: %d' % len(body))
+        self.wfile.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+
     def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
         path = urlparse(self.path).path
         
         if path == '/api/agents':
-            agents = self.discover_real_agents()
-            self.wfile.write(json.dumps(agents).encode())
-        elif path == '/health':
-            health = {
-                'status': 'ok',
-                'timestamp': datetime.now().isoformat(),
-                'server': 'real-agent-server',
-                'port': 7778
-            }
-            self.wfile.write(json.dumps(health).encode())
+            snapshot = _snapshot
+            body, etag = snapshot['body'], snapshot['etag']
+            cache_headers = (('Cache-Control', 'max-age=5'), ('Vary', 'Accept-Encoding'))
+            if _accepts_gzip(self.headers.get('Accept-Encoding')):
+                body, etag = snapshot['gzipped'], etag[:-1] + '-gzip"'
+                cache_headers += (('Content-Encoding', 'gzip'),)
+            cache_headers += (('ETag', etag),)
+            if _etag_matches(self.headers.get('If-None-Match'), etag):
+                self._send(304, b'', cache_headers + (('Access-Control-Allow-Origin', '*'),))
+            else:
+                self._send(200, body, _JSON_HEADERS + cache_headers)
+            return
+        
+        if path == '/health':
+            body = _HEALTH_PREFIX + datetime.now().isoformat().encode() + _HEALTH_SUFFIX
         elif path == '/api/dashboard/stats':
-            agents = self.discover_real_agents()
+            columns = _snapshot['columns']
+            total = len(columns['status'])
             stats = {
-                'totalAgents': len(agents),
-                'activeAgents': len([a for a in agents if a['status'] == 'active']),
-                'businessAgents': len([a for a in agents if 'business' in a['type']]),
-                'autonomousAgents': len([a for a in agents if a['type'] == 'autonomous']),
-                'averageCpu': sum(a['cpu'] for a in agents) // len(agents) if agents else 0,
-                'averageMemory': sum(a['memory'] for a in agents) // len(agents) if agents else 0,
-                'totalTasks': sum(a['tasks']['completed'] + a['tasks']['active'] for a in agents),
+                'totalAgents': total,
+                'activeAgents': columns['status'].count('active'),
+                'businessAgents': sum('business' in t for t in columns['type']),
+                'autonomousAgents': columns['type'].count('autonomous'),
+                'averageCpu': sum(columns['cpu']) // total if total else 0,
+                'averageMemory': sum(columns['memory']) // total if total else 0,
+                'totalTasks': sum(columns['tasks']),
                 'lastUpdated': datetime.now().isoformat()
             }
-            self.wfile.write(json.dumps(stats).encode())
+            body = _dumps(stats)
         else:
-            self.wfile.write(json.dumps({'message': 'Real Agent API', 'status': 'running'}).encode())
+            body = _ROOT_BODY
+        self._send(200, body, _JSON_HEADERS)
 
-    def discover_real_agents(self):
-        agents = []
-        
-        # Business service agents
-        business_path = '/home/ssurles/Projects/NiroAgent/na-business-service'
-        if os.path.exists(business_path):
-            agent_files = glob.glob(f'{business_path}/**/ai-*-agent-real.py', recursive=True)
-            for i, file in enumerate(agent_files):
-                agent_type = 'qa' if 'qa' in file else 'developer' if 'developer' in file else 'unknown'
-                stat = os.stat(file)
-                agents.append({
-                    'id': f'business-{agent_type}-{i+1}',
-                    'name': f'AI {agent_type.upper()} Agent',
-                    'type': f'business-{agent_type}',
-                    'status': 'active',
-                    'lastSeen': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                    'cpu': random.randint(15, 60),
-                    'memory': random.randint(20, 80),
-                    'tasks': {
-                        'completed': random.randint(10, 50),
-                        'active': random.randint(0, 8),
-                        'failed': random.randint(0, 3)
-                    },
-                    'source': 'business-service',
-                    'location': file.replace('/home/ssurles/Projects/', ''),
-                    'riskLevel': 'low' if random.random() > 0.2 else 'medium'
-                })
-        
-        # Autonomous system agents
-        auto_path = '/home/ssurles/Projects/NiroAgent/na-autonomous-system'
-        if os.path.exists(auto_path):
-            agent_files = glob.glob(f'{auto_path}/**/*.py', recursive=True)[:5]
-            for i, file in enumerate(agent_files):
-                agents.append({
-                    'id': f'autonomous-{i+1}',
-                    'name': f'Autonomous Agent {i+1}',
-                    'type': 'autonomous',
-                    'status': random.choice(['active', 'idle', 'busy']),
-                    'lastSeen': (datetime.now() - timedelta(minutes=random.randint(1, 60))).isoformat(),
-                    'cpu': random.randint(10, 80),
-                    'memory': random.randint(15, 70),
-                    'tasks': {
-                        'completed': random.randint(5, 30),
-                        'active': random.randint(0, 5),
-                        'failed': random.randint(0, 2)
-                    },
-                    'source': 'autonomous-system',
-                    'location': file.replace('/home/ssurles/Projects/', ''),
-                    'riskLevel': 'low' if random.random() > 0.3 else 'medium'
-                })
-        
-        # Dashboard service agents (from current repo)
-        dashboard_path = '/home/ssurles/Projects/NiroAgent/na-agent-dashboard'
-        if os.path.exists(dashboard_path):
-            agents.append({
-                'id': 'dashboard-api-1',
-                'name': 'Dashboard API Server',
-                'type': 'dashboard-service',
-                'status': 'active',
-                'lastSeen': datetime.now().isoformat(),
-                'cpu': random.randint(20, 50),
-                'memory': random.randint(30, 60),
-                'tasks': {
-                    'completed': random.randint(100, 500),
-                    'active': random.randint(5, 20),
-                    'failed': random.randint(0, 5)
-                },
-                'source': 'dashboard-service',
-                'location': 'NiroAgent/na-agent-dashboard',
-                'riskLevel': 'low'
-            })
-        
-        return agents
+def serve(server, workers, on_start):
+    """Serve forever; with workers > 1 (Unix only), fork that many children
+    onto the already-bound socket and wait for them, forwarding signals"""
+    if workers <= 1 or not hasattr(os, 'fork'):
+        on_start()
+        server.serve_forever()
+        return
+    children = set()
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                on_start()
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        children.add(pid)
+
+    def forward(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+    server.server_close()
 
 if __name__ == '__main__':
-    server = HTTPServer(('0.0.0.0', 7778), RealAgentHandler)
+    # Bind once in this process so a second instance still fails with
+    # EADDRINUSE; forked workers (API_WORKERS > 1) share the socket
+    server = ThreadingHTTPServer(('0.0.0.0', 7778), RealAgentHandler)
     print(f'🤖 Real Agent Server running on port 7778')
     print(f'📊 Health: http://localhost:7778/health')
     print(f'🔗 Agents: http://localhost:7778/api/agents')
@@ -128,4 +274,5 @@ if __name__ == '__main__':
     print('  - Business Service: /na-business-service/')
     print('  - Autonomous System: /na-autonomous-system/')
     print('  - Dashboard Service: /na-agent-dashboard/')
-    server.serve_forever()
+    # The refresher starts in each worker: threads do not survive fork()
+    serve(server, int(os.environ.get('API_WORKERS', 1)), start_refresher)
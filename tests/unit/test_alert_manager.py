@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Unit tests for alert rule evaluation in scripts/alert-manager.py.
+"""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+_SCRIPT = Path(__file__).resolve().parents[2] / "scripts" / "alert-manager.py"
+_spec = importlib.util.spec_from_file_location("alert_manager", _SCRIPT)
+alert_manager = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(alert_manager)
+
+HEALTHY_METRICS = {
+    'discovery_server': {'response_time_ms': 100, 'status': 'healthy'},
+    'daemon_agents': {'active_daemon_agents': 5, 'total_daemon_agents': 5},
+    'system_resources': {'cpu_percent': 10, 'memory_percent': 20},
+    'overall_health': {'status': 'healthy'},
+    'deprecated_services': {'running_deprecated_services': []},
+}
+
+@pytest.fixture
+def manager():
+    manager = alert_manager.AlertManager()
+    yield manager
+    manager.close()
+
+def fired(alerts):
+    return [alert.component for alert in alerts]
+
+def test_healthy_metrics_fire_nothing(manager):
+    assert manager.evaluate_rules(HEALTHY_METRICS) == []
+
+def test_missing_section_falls_back_to_rule_default(manager):
+    # No daemon_agents section: active_daemon_agents defaults to 0 < 3
+    metrics = {
+        'discovery_server': {'status': 'error'},
+        'system_resources': {'cpu_percent': 10, 'memory_percent': 20},
+    }
+    assert fired(manager.evaluate_rules(metrics)) == ['agent_down']
+
+def test_alerts_follow_rule_order(manager):
+    # Sections listed in the reverse of the rule order
+    metrics = {
+        'deprecated_services': {'running_deprecated_services': ['api_server']},
+        'overall_health': {'status': 'critical'},
+        'system_resources': {'cpu_percent': 95, 'memory_percent': 95},
+        'daemon_agents': {'active_daemon_agents': 1},
+        'discovery_server': {'response_time_ms': 9000},
+    }
+    rule_order = [rule.name for rule in manager.rules]
+    assert fired(manager.evaluate_rules(metrics)) == rule_order
+
+def test_set_rules_picks_up_in_place_edits(manager):
+    metrics = {**HEALTHY_METRICS, 'system_resources': {'cpu_percent': 50, 'memory_percent': 20}}
+    assert manager.evaluate_rules(metrics) == []
+    
+    rules = list(manager.rules)
+    high_cpu = next(index for index, rule in enumerate(rules) if rule.name == 'high_cpu')
+    rules[high_cpu] = alert_manager.AlertRule(
+        name='high_cpu',
+        condition='cpu_percent > threshold',
+        threshold=40,
+        duration=0,
+        level=alert_manager.AlertLevel.WARNING,
+        channels=[],
+    )
+    manager.set_rules(rules)
+    assert fired(manager.evaluate_rules(metrics)) == ['high_cpu']
+
+def test_add_rule_is_evaluated(manager):
+    manager.add_rule(alert_manager.AlertRule(
+        name='busy_cpu',
+        condition='cpu_percent > threshold',
+        threshold=5,
+        duration=0,
+        level=alert_manager.AlertLevel.INFO,
+        channels=[],
+    ))
+    assert fired(manager.evaluate_rules(HEALTHY_METRICS)) == ['busy_cpu']
+
+def test_rule_appended_directly_is_compiled_on_first_use(manager):
+    manager.rules.append(alert_manager.AlertRule(
+        name='busy_cpu',
+        condition='cpu_percent > threshold',
+        threshold=5,
+        duration=0,
+        level=alert_manager.AlertLevel.INFO,
+        channels=[],
+    ))
+    assert fired(manager.evaluate_rules(HEALTHY_METRICS)) == ['busy_cpu']
+
+def test_repeat_count_survives_other_rules_sending(manager, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(alert_manager.time, 'monotonic', lambda: clock[0])
+    slow = {**HEALTHY_METRICS, 'discovery_server': {'response_time_ms': 9000}}
+    busy = {**HEALTHY_METRICS, 'system_resources': {'cpu_percent': 95, 'memory_percent': 20}}
+    
+    assert fired(manager.evaluate_rules(slow)) == ['high_response_time']
+    clock[0] += 10
+    assert manager.evaluate_rules(slow) == []
+    
+    # Another rule sends once the first one's fingerprint has aged out
+    clock[0] += 300
+    assert fired(manager.evaluate_rules(busy)) == ['high_cpu']
+    
+    alerts = manager.evaluate_rules(slow)
+    assert fired(alerts) == ['high_response_time']
+    assert alerts[0].dedup_count == 1
+    assert alerts[0].message.startswith('(repeated 1x)')
+
+def test_stale_repeat_counts_expire(manager, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(alert_manager.time, 'monotonic', lambda: clock[0])
+    slow = {**HEALTHY_METRICS, 'discovery_server': {'response_time_ms': 9000}}
+    busy = {**HEALTHY_METRICS, 'system_resources': {'cpu_percent': 95, 'memory_percent': 20}}
+    
+    manager.evaluate_rules(slow)
+    clock[0] += 10
+    manager.evaluate_rules(slow)
+    
+    # Long past the repeat window another rule's send prunes the count
+    clock[0] += 300 * alert_manager._REPEAT_COUNT_COOLDOWNS
+    manager.evaluate_rules(busy)
+    assert len(manager._fp_state) == 1
+    
+    alerts = manager.evaluate_rules(slow)
+    assert fired(alerts) == ['high_response_time']
+    assert alerts[0].dedup_count == 0
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Unit tests for pattern matching in scripts/check-deprecated-dependencies.py.
+"""
+
+import importlib.util
+from pathlib import Path
+
+_SCRIPT = Path(__file__).resolve().parents[2] / "scripts" / "check-deprecated-dependencies.py"
+_spec = importlib.util.spec_from_file_location("check_deprecated_dependencies", _SCRIPT)
+checker_module = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(checker_module)
+
+FIXTURE = (
+    'fetch("http://localhost:7778/api"); fetch("http://localhost:7777/x")\n'
+    '"http://example.com/servers/simple-server:7777"\n'
+    'const port = 7777;\n'
+)
+
+def scan(tmp_path, text):
+    path = tmp_path / "fixture.js"
+    path.write_text(text)
+    checker = checker_module.DeprecatedDependencyChecker(str(tmp_path))
+    return sorted((issue.line, issue.deprecated_item) for issue in checker.scan_file(path))
+
+def test_overlapping_patterns_are_all_reported(tmp_path):
+    assert scan(tmp_path, FIXTURE) == [
+        (1, r"http://.*:7777"),
+        (1, r"localhost:7778"),
+        (2, r"http://.*:7777"),
+        (2, r"servers/simple-server"),
+        (3, r"port\s*[=:]\s*7777"),
+    ]
+
+def test_clean_file_reports_nothing(tmp_path):
+    assert scan(tmp_path, 'fetch("http://localhost:8080/api")\n') == []